@@ -1,4 +1,5 @@
 import sys
+import session_profiler
 from PyQt6.QtWidgets import (QApplication, QWidget, QPushButton, QListWidget, QVBoxLayout, QHBoxLayout, QLabel, QSlider)
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QPalette, QColor
@@ -91,6 +92,8 @@ class MediaPlayer(QWidget):
             self.media_clip.preview()  # Play the video
 
     def load_media(self, media_path):
+        # One profile per file when --profile or MEDIAPLAYER_PROFILE=1 is set
+        session_profiler.switch_session(media_path)
         if self.media_clip:
             self.media_clip.close()  # Close the previous media
         self.media_clip = VideoFileClip(media_path)
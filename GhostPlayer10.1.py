@@ -1,4 +1,5 @@
 import sys
+import session_profiler
 import os
 import pygame
 from PyQt6.QtWidgets import (QApplication, QWidget, QPushButton, QListWidget, QVBoxLayout, 
@@ -131,6 +132,7 @@ class MediaPlayer(QWidget):
                 self.pause_button.setText("Pause")
 
     def stop_media(self):
+        session_profiler.switch_session(None)
         self.playing = False
         self.paused = False
         self.timer.stop()
@@ -157,6 +159,9 @@ class MediaPlayer(QWidget):
             print(f"Error: File not found: {media_path}")
             return
 
+        # One profile per file when --profile or MEDIAPLAYER_PROFILE=1 is set
+        session_profiler.switch_session(media_path)
+
         self.progress_slider.setValue(0)
 
         if media_path.endswith(('.mp4', '.avi')):
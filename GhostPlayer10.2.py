@@ -1,4 +1,5 @@
 import sys
+import session_profiler
 import os
 import pygame
 from PyQt6.QtWidgets import (QApplication, QWidget, QPushButton, QListWidget, QVBoxLayout, 
@@ -190,6 +191,9 @@ class MediaPlayer(QWidget):
             print(f"Error: File not found: {media_path}")
             return
 
+        # One profile per file when --profile or MEDIAPLAYER_PROFILE=1 is set
+        session_profiler.switch_session(media_path)
+
         self.progress_slider.setValue(0)
         
         try:
@@ -278,6 +282,7 @@ class MediaPlayer(QWidget):
                 self.progress_timer.start()
 
     def stop_media(self):
+        session_profiler.switch_session(None)
         self.playing = False
         self.paused = False
         self.pause_button.setText("Pause")
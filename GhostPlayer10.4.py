@@ -1,4 +1,5 @@
 import sys
+import session_profiler
 import os
 import pygame
 from PyQt6.QtWidgets import (QApplication, QWidget, QPushButton, QListWidget, QVBoxLayout,
@@ -194,6 +195,9 @@ class MediaPlayer(QWidget):
             self.current_media_label.setText("Error loading media")
             return
 
+        # One profile per file when --profile or MEDIAPLAYER_PROFILE=1 is set
+        session_profiler.switch_session(media_path)
+
         self.progress_slider.setValue(0)
 
         try:
@@ -276,6 +280,7 @@ class MediaPlayer(QWidget):
                 self.pause_button.setText("Pause")
 
     def stop_media(self):
+        session_profiler.switch_session(None)
         if self.playing:
             self.playing = False
             self.paused = False
@@ -1,4 +1,5 @@
 import sys
+import session_profiler
 import os
 import pygame
 from PyQt6.QtWidgets import (QApplication, QWidget, QPushButton, QListWidget, QVBoxLayout,
@@ -196,6 +197,9 @@ class MediaPlayer(QWidget):
             self.current_media_label.setText("Error loading media")
             return
 
+        # One profile per file when --profile or MEDIAPLAYER_PROFILE=1 is set
+        session_profiler.switch_session(media_path)
+
         try:
             if media_path.lower().endswith(('.mp4', '.avi')):
                 self.is_video = True
@@ -260,6 +264,7 @@ class MediaPlayer(QWidget):
                     self.pause_button.setText("Pause")
 
     def stop_media(self):
+        session_profiler.switch_session(None)
         if self.playing:
             self.playing = False
             if self.is_video:
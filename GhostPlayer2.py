@@ -1,4 +1,5 @@
 import sys
+import session_profiler
 from PyQt6.QtWidgets import (QApplication, QWidget, QPushButton, QListWidget, QVBoxLayout, QHBoxLayout, QLabel, QSlider)
 from PyQt6.QtCore import Qt, QTimer
 from moviepy.editor import VideoFileClip
@@ -108,6 +109,7 @@ class MediaPlayer(QWidget):
             self.playing = False
 
     def stop_media(self):
+        session_profiler.switch_session(None)
         self.playing = False
         self.timer.stop()
         if self.media_player:
@@ -131,6 +133,9 @@ class MediaPlayer(QWidget):
             print(f"Error: File not found: {media_path}")
             return
 
+        # One profile per file when --profile or MEDIAPLAYER_PROFILE=1 is set
+        session_profiler.switch_session(media_path)
+
         if media_path.endswith('.mp4') or media_path.endswith('.avi'):
             self.media_clip = VideoFileClip(media_path)
             self.video_surface = pygame.image.load(media_path)
@@ -1,4 +1,5 @@
 import sys
+import session_profiler
 import os
 import pygame
 from PyQt6.QtWidgets import (QApplication, QWidget, QPushButton, QListWidget, QVBoxLayout, 
@@ -125,6 +126,7 @@ class MediaPlayer(QWidget):
             self.pause_button.setText("Pause")  # Change button back to Pause
 
     def stop_media(self):
+        session_profiler.switch_session(None)
         self.playing = False
         self.timer.stop()
         pygame.mixer.music.stop()
@@ -146,6 +148,9 @@ class MediaPlayer(QWidget):
             print(f"Error: File not found: {media_path}")
             return
 
+        # One profile per file when --profile or MEDIAPLAYER_PROFILE=1 is set
+        session_profiler.switch_session(media_path)
+
         # Reset the progress slider
         self.progress_slider.setValue(0)
 
@@ -1,4 +1,5 @@
 import sys
+import session_profiler
 import os
 import pygame
 from PyQt6.QtWidgets import (QApplication, QWidget, QPushButton, QListWidget, QVBoxLayout, 
@@ -128,6 +129,7 @@ class MediaPlayer(QWidget):
             pygame.mixer.music.unpause()
 
     def stop_media(self):
+        session_profiler.switch_session(None)
         self.playing = False
         self.timer.stop()
         self.current_media_label.setText("Stopped")
@@ -153,6 +155,9 @@ class MediaPlayer(QWidget):
             print(f"Error: File not found: {media_path}")
             return
 
+        # One profile per file when --profile or MEDIAPLAYER_PROFILE=1 is set
+        session_profiler.switch_session(media_path)
+
         self.progress_slider.setValue(0)
 
         if media_path.endswith(('.mp4', '.avi')):
@@ -0,0 +1,480 @@
+import threading
+import time
+import numpy as np
+import pygame
+import wakeups
+from playback_stats import stats
+from time_stretch import WsolaStretcher
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+# 256 frames is ~5.8 ms at 44.1 kHz; with one block playing and one queued
+# the mixer adds under 12 ms of latency. With an AdaptiveAudioOutput the block
+# is half the device buffer instead, so the two blocks add one device buffer:
+# 23 ms at the default 1024 frames, more once the buffer has grown under load
+BLOCK_SIZE = 256
+# Video soundtracks are decoded this many seconds at a time, a chunk ahead of
+# the mixer, so a film's audio is never held in memory whole
+CLIP_CHUNK_SECONDS = 4.0
+# Warn once rendering a block takes this fraction of the block's duration
+BUDGET_WARN_RATIO = 0.7
+
+
+class GainRamp:
+    def __init__(self, value=1.0):
+        self.value = value
+        self.target = value
+        self.remaining = 0
+
+    def ramp_to(self, target, frames):
+        self.target = target
+        self.remaining = max(0, int(frames))
+        if self.remaining == 0:
+            self.value = target
+
+    def render(self, frames):
+        # Returns a scalar while steady, otherwise a (frames, 1) gain column
+        if self.remaining == 0:
+            return self.value
+        n = min(frames, self.remaining)
+        step = (self.target - self.value) / self.remaining
+        gains = np.empty(frames, dtype=np.float32)
+        gains[:n] = self.value + step * np.arange(1, n + 1, dtype=np.float32)
+        self.remaining -= n
+        self.value = self.target if self.remaining == 0 else float(gains[n - 1])
+        gains[n:] = self.value
+        return gains[:, None]
+
+
+class MixerSource:
+    def __init__(self, samples, volume=1.0, duckable=True, name=""):
+        self.samples = samples
+        self.position = 0
+        self.volume = volume
+        self.duckable = duckable
+        self.name = name
+        self.fade = GainRamp(1.0)
+        self.fading_out = False
+        # Tempo; anything but 1.0 plays through a pitch-preserving stretcher
+        self.rate = 1.0
+        self.stretcher = None
+        # (start, end) sample positions of an A-B loop
+        self.loop = None
+        # Bumped when the position or rate jumps, so blocks rendered before it
+        # are not used to tell what is being heard
+        self.generation = 0
+
+    @property
+    def duration(self):
+        return len(self.samples) / SAMPLE_RATE
+
+    @property
+    def time(self):
+        return self.position / SAMPLE_RATE
+
+    @property
+    def finished(self):
+        return self.position >= len(self.samples) or (self.fading_out and self.fade.remaining == 0)
+
+    def read(self, frames):
+        # The next block, advancing the position; a loop wraps inside the block
+        if self.stretcher:
+            with stats.timer("audio time stretch"):
+                chunk = self.stretcher.read(self.samples, frames)
+            self.position = min(self.stretcher.position, len(self.samples))
+            if self.loop and self.position >= self.loop[1]:
+                self.position = self.loop[0]
+                self.stretcher.reset(self.position)
+            return chunk
+        if not self.loop:
+            chunk = self.samples[self.position:self.position + frames]
+            self.position += len(chunk)
+            return chunk
+        start, end = self.loop
+        parts = []
+        while frames > 0:
+            part = self.samples[self.position:min(self.position + frames, end)]
+            parts.append(part)
+            frames -= len(part)
+            self.position += len(part)
+            if self.position >= end:
+                self.position = start
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+
+def to_float_samples(samples):
+    # Normalise decoded PCM to float32 (frames, CHANNELS) in [-1, 1]
+    if isinstance(samples, ClipAudio):
+        return samples
+    samples = np.asarray(samples)
+    if samples.dtype.kind == "i":
+        samples = samples.astype(np.float32) / float(np.iinfo(samples.dtype).max)
+    else:
+        samples = samples.astype(np.float32, copy=False)
+    if samples.ndim == 1:
+        samples = samples[:, None]
+    if samples.shape[1] != CHANNELS:
+        samples = np.repeat(samples[:, :1], CHANNELS, axis=1)
+    return np.ascontiguousarray(samples)
+
+
+def load_sound(path):
+    # Decode a whole file through pygame's mixer into a float PCM array
+    return to_float_samples(pygame.sndarray.array(pygame.mixer.Sound(path)))
+
+
+def load_clip_audio(audio_clip):
+    # A moviepy audio clip as mixer samples, decoded as it plays
+    return ClipAudio(audio_clip)
+
+
+class ClipAudio:
+    # Read-only samples for a MixerSource: slices return float PCM like a
+    # loaded array, from chunks a worker decodes around the last slice read.
+    # A chunk that is not ready yet reads as silence rather than holding up
+    # the output thread, which only happens for a moment after a seek
+    def __init__(self, audio_clip):
+        self.clip = audio_clip
+        self.chunk = int(CLIP_CHUNK_SECONDS * SAMPLE_RATE)
+        self.length = int(audio_clip.duration * SAMPLE_RATE)
+        self.shape = (self.length, CHANNELS)
+        self.chunks = {}  # chunk index -> float32 samples
+        self.wanted = 0
+        self.running = True
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.worker, name="soundtrack decode", daemon=True)
+        self.thread.start()
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, key):
+        start, stop, _ = key.indices(self.length)
+        if stop <= start:
+            return np.zeros((0, CHANNELS), np.float32)
+        first, last = start // self.chunk, (stop - 1) // self.chunk
+        parts = []
+        with self.condition:
+            if self.wanted != first:
+                self.wanted = first
+                self.condition.notify_all()
+            for index in range(first, last + 1):
+                offset = index * self.chunk
+                low, high = max(start - offset, 0), min(stop - offset, self.chunk)
+                samples = self.chunks.get(index)
+                if samples is None:
+                    stats.incr("soundtrack reads late")
+                    samples = np.zeros((high, CHANNELS), np.float32)
+                parts.append(samples[low:high])
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def needed(self):
+        # The chunk being read and the next, in decode order
+        return [i for i in (self.wanted, self.wanted + 1) if i * self.chunk < self.length]
+
+    def worker(self):
+        while True:
+            with self.condition:
+                job = None
+                while self.running and job is None:
+                    job = next((i for i in self.needed() if i not in self.chunks), None)
+                    if job is None:
+                        self.condition.wait()
+                if not self.running:
+                    return
+                # The chunk before the one being read stays for the time stretcher's look-back
+                for index in [i for i in self.chunks if not self.wanted - 1 <= i <= self.wanted + 1]:
+                    del self.chunks[index]
+            samples = self.decode(job)
+            with self.condition:
+                self.chunks[job] = samples
+                self.condition.notify_all()
+
+    def decode(self, index):
+        # Exactly one chunk of frames, padded or trimmed to what the slices expect
+        frames = min(self.chunk, self.length - index * self.chunk)
+        start = index * self.chunk / SAMPLE_RATE
+        try:
+            with stats.timer("soundtrack decode"):
+                clip = self.clip.subclip(start, min(start + CLIP_CHUNK_SECONDS, self.clip.duration))
+                samples = to_float_samples(clip.to_soundarray(fps=SAMPLE_RATE))[:frames]
+        except Exception as e:
+            print(f"Error decoding soundtrack: {e}")
+            samples = np.zeros((0, CHANNELS), np.float32)
+        if len(samples) < frames:
+            samples = np.concatenate([samples, np.zeros((frames - len(samples), CHANNELS), np.float32)])
+        return samples
+
+    def close(self):
+        with self.condition:
+            self.running = False
+            self.chunks.clear()
+            self.condition.notify_all()
+
+
+class AudioMixer:
+    def __init__(self, block_size=BLOCK_SIZE, channel_id=0, output=None):
+        self.output = output
+        self.block_size = output.block_size if output else block_size
+        self.channel_id = channel_id
+        self.sources = []
+        self.duck = GainRamp(1.0)
+        self.master_volume = 1.0
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = False
+        self.paused = False
+        self.thread = None
+        self.channel = None
+        self.underruns = 0
+        self.primed = False
+        self.queued_at = None
+        # {source: (position, generation)} at the start of the last block rendered,
+        # of the block queued on the channel, and of the block the channel was
+        # last seen to start playing, with when that was
+        self.rendered_marks = {}
+        self.queued_marks = {}
+        self.playing = ({}, 0.0)
+        self.blocks_rendered = 0
+        self.budget_ratio = 0.0
+        self.peak_budget_ratio = 0.0
+        self.budget_warnings = 0
+
+    @property
+    def block_duration(self):
+        return self.block_size / SAMPLE_RATE
+
+    def frames(self, seconds):
+        return int(seconds * SAMPLE_RATE)
+
+    def add_source(self, samples, volume=1.0, fade_in=0.0, duckable=True, name=""):
+        source = MixerSource(to_float_samples(samples), volume, duckable, name)
+        if fade_in > 0:
+            source.fade.value = 0.0
+            source.fade.ramp_to(1.0, self.frames(fade_in))
+        self.add(source)
+        return source
+
+    def add(self, source):
+        # Puts a source made elsewhere, or taken out with remove(), into the mix
+        with self.lock:
+            if source not in self.sources:
+                self.sources.append(source)
+        self.wake.set()
+
+    def remove(self, source):
+        # Out of the mix from the next block, keeping its position
+        with self.lock:
+            if source in self.sources:
+                self.sources.remove(source)
+
+    def fade_out(self, source, seconds):
+        with self.lock:
+            source.fading_out = True
+            source.fade.ramp_to(0.0, self.frames(seconds))
+
+    def crossfade_to(self, samples, seconds=2.0, volume=1.0, name=""):
+        # Fade every current source out while the new one fades in
+        with self.lock:
+            for source in self.sources:
+                source.fading_out = True
+                source.fade.ramp_to(0.0, self.frames(seconds))
+        return self.add_source(samples, volume, fade_in=seconds, name=name)
+
+    def set_ducking(self, gain, seconds=0.2):
+        with self.lock:
+            self.duck.ramp_to(gain, self.frames(seconds))
+
+    def set_volume(self, source, volume):
+        with self.lock:
+            source.volume = volume
+
+    def seek(self, source, seconds):
+        with self.lock:
+            source.position = min(max(self.frames(seconds), 0), len(source.samples))
+            source.generation += 1
+            if source.stretcher:
+                source.stretcher.reset(source.position)
+
+    def set_loop(self, source, start, end):
+        # Loops the source's [start, end) seconds from memory; None clears it
+        with self.lock:
+            if start is None:
+                source.loop = None
+                return
+            start = min(max(self.frames(start), 0), len(source.samples) - 1)
+            end = min(max(self.frames(end), start + 1), len(source.samples))
+            source.loop = (start, end)
+            if not start <= source.position < end:
+                source.position = start
+                source.generation += 1
+                if source.stretcher:
+                    source.stretcher.reset(start)
+
+    def set_rate(self, source, rate):
+        # Takes effect from the next block, with no reload of the source
+        with self.lock:
+            if rate != source.rate:
+                source.generation += 1
+            source.rate = rate
+            if rate == 1.0:
+                source.stretcher = None
+            elif source.stretcher:
+                source.stretcher.rate = rate
+            else:
+                source.stretcher = WsolaStretcher(rate)
+                source.stretcher.reset(source.position)
+
+    def remove_all(self):
+        with self.lock:
+            self.sources = []
+
+    def current_source(self):
+        # The most recently added source that is not fading out
+        with self.lock:
+            for source in reversed(self.sources):
+                if not source.fading_out:
+                    return source
+        return None
+
+    def render(self, frames):
+        out = np.zeros((frames, CHANNELS), dtype=np.float32)
+        marks = {}
+        with self.lock:
+            duck = self.duck.render(frames)
+            for source in self.sources:
+                marks[source] = (source.position, source.generation)
+                chunk = source.read(frames)
+                n = len(chunk)
+                if n == 0:
+                    continue
+                gain = source.fade.render(frames) * source.volume
+                if source.duckable:
+                    gain = gain * duck
+                if np.ndim(gain):
+                    gain = gain[:n]
+                out[:n] += chunk * gain
+            self.sources = [s for s in self.sources if not s.finished]
+        self.rendered_marks = marks
+        out *= self.master_volume
+        np.clip(out, -1.0, 1.0, out=out)
+        return (out * 32767).astype(np.int16)
+
+    def start(self):
+        if self.running:
+            return
+        if self.output:
+            # Blocks are rendered at SAMPLE_RATE and CHANNELS, so a device left
+            # at another format would play them at the wrong speed or refuse them
+            if not self.output.is_current():
+                self.output.open()
+            self.block_size = self.output.block_size
+        self.channel = pygame.mixer.Channel(self.channel_id)
+        self.primed = False
+        self.running = True
+        self.thread = threading.Thread(target=self._output_loop, name="audio mixer", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.paused = False
+        self.wake.set()
+        if self.thread:
+            self.thread.join(timeout=1)
+            self.thread = None
+        if self.channel:
+            self.channel.stop()
+        self.remove_all()
+
+    def pause(self):
+        self.paused = True
+        if self.channel:
+            self.channel.pause()
+
+    def resume(self):
+        self.paused = False
+        if self.channel:
+            self.channel.unpause()
+        self.wake.set()
+
+    def _record_budget(self, elapsed):
+        stats.record("audio block render", elapsed)
+        ratio = elapsed / self.block_duration
+        self.budget_ratio = 0.9 * self.budget_ratio + 0.1 * ratio
+        self.peak_budget_ratio = max(self.peak_budget_ratio, ratio)
+        if self.budget_ratio > BUDGET_WARN_RATIO:
+            self.budget_warnings += 1
+            if self.budget_warnings == 1 or self.budget_warnings % 100 == 0:
+                print(f"Warning: audio mixer using {self.budget_ratio:.0%} of its block budget, "
+                      f"underruns likely")
+
+    def _reopen_output(self):
+        # Runs on the output thread, so nothing else touches the channel meanwhile
+        self.channel.stop()
+        self.output.open()
+        self.channel = pygame.mixer.Channel(self.channel_id)
+        self.block_size = self.output.block_size
+        self.primed = False
+        self.queued_at = None
+
+    def _output_loop(self):
+        while self.running:
+            wakeups.count("audio mixer")
+            if self.paused or not self.sources:
+                # Sleep until a source is added, playback resumes or the mixer stops
+                self.wake.clear()
+                if self.paused or not self.sources:
+                    self.wake.wait()
+                continue
+            if self.output and self.output.adapt(self.budget_ratio):
+                self._reopen_output()
+            if self.channel.get_queue() is not None:
+                time.sleep(self.block_duration / 4)
+                continue
+            now = time.perf_counter()
+            if self.queued_at is not None:
+                # The queued block has started playing since the last look
+                self.playing = (self.queued_marks, now)
+                if self.output:
+                    self.output.record_queue_wait(now - self.queued_at)
+                stats.record("audio queue wait", now - self.queued_at)
+                self.queued_at = None
+            sound = pygame.sndarray.make_sound(self.render(self.block_size))
+            self._record_budget(time.perf_counter() - now)
+            if not self.channel.get_busy():
+                if self.primed:
+                    self.underruns += 1
+                    stats.incr("audio underruns")
+                    if self.output:
+                        self.output.record_underrun()
+                self.channel.play(sound)
+                self.playing = (self.rendered_marks, time.perf_counter())
+                self.primed = True
+            else:
+                self.channel.queue(sound)
+                self.queued_marks = self.rendered_marks
+                self.queued_at = time.perf_counter()
+            self.blocks_rendered += 1
+
+    def heard_time(self, source):
+        # Media seconds of source reaching the speaker now: where the block the
+        # channel was last seen to start began, plus the time since, less the
+        # device buffer it still has to pass through. None while paused or
+        # until a block rendered after the last seek or rate change has started
+        marks, since = self.playing
+        mark = marks.get(source)
+        if self.paused or mark is None or mark[1] != source.generation:
+            return None
+        latency = self.output.buffer_latency if self.output else 0.0
+        return mark[0] / SAMPLE_RATE + (time.perf_counter() - since - latency) * source.rate
+
+    def stats(self):
+        return {
+            "block_size": self.block_size,
+            "block_ms": self.block_duration * 1000,
+            "sources": len(self.sources),
+            "blocks_rendered": self.blocks_rendered,
+            "underruns": self.underruns,
+            "budget_ratio": self.budget_ratio,
+            "peak_budget_ratio": self.peak_budget_ratio,
+        }
@@ -0,0 +1,134 @@
+import json
+import os
+import time
+import pygame
+from audio_mixer import SAMPLE_RATE, CHANNELS
+from playback_stats import stats
+
+MIN_BUFFER = 256
+MAX_BUFFER = 4096
+DEFAULT_BUFFER = 1024
+# Seconds between adaptation decisions, and how long output has to stay
+# clean before the buffer is allowed to shrink again
+ADAPT_INTERVAL = 2.0
+CALM_SECONDS = 20.0
+STATE_PATH = os.path.join(os.path.expanduser("~"), ".mediaplayer", "audio.json")
+
+
+class AdaptiveAudioOutput:
+    def __init__(self, frequency=SAMPLE_RATE, channels=CHANNELS, buffer=None,
+                 min_buffer=MIN_BUFFER, max_buffer=MAX_BUFFER, state_path=STATE_PATH):
+        self.frequency = frequency
+        self.channels = channels
+        self.min_buffer = min_buffer
+        self.max_buffer = max_buffer
+        self.state_path = state_path
+        self.buffer = buffer or self.load_buffer()
+        self.underruns = 0
+        self.window_underruns = 0
+        self.reinits = 0
+        self.queue_wait = 0.0
+        self.last_adapt = time.monotonic()
+        self.last_change = self.last_adapt
+
+    def load_buffer(self):
+        # Start from the last buffer size that worked on this host
+        try:
+            with open(self.state_path) as f:
+                buffer = int(json.load(f)["buffer"])
+            return min(max(buffer, self.min_buffer), self.max_buffer)
+        except Exception:
+            return DEFAULT_BUFFER
+
+    def save_buffer(self):
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(self.state_path, "w") as f:
+                json.dump({"buffer": self.buffer}, f)
+        except Exception as e:
+            print(f"Error saving audio settings: {e}")
+
+    def open(self):
+        if pygame.mixer.get_init():
+            pygame.mixer.quit()
+        # AudioMixer renders at SAMPLE_RATE and CHANNELS, so SDL is told to
+        # convert rather than let the device pick another format
+        try:
+            pygame.mixer.init(frequency=self.frequency, size=-16, channels=self.channels,
+                              buffer=self.buffer, allowedchanges=0)
+        except TypeError:
+            # pygame 1.9 has no allowedchanges
+            pygame.mixer.init(frequency=self.frequency, size=-16, channels=self.channels,
+                              buffer=self.buffer)
+        frequency, _, channels = pygame.mixer.get_init()
+        if (frequency, channels) != (self.frequency, self.channels):
+            print(f"Error: audio device opened at {frequency} Hz, {channels} channels "
+                  f"instead of {self.frequency} Hz, {self.channels} channels")
+        self.reinits += 1
+        self.publish()
+
+    def is_current(self):
+        # False once something else has reopened the device at its own format,
+        # as moviepy's preview does with 22.05 kHz and a 1024-frame buffer
+        return pygame.mixer.get_init() == (self.frequency, -16, self.channels)
+
+    @property
+    def block_size(self):
+        # Software mixer blocks follow the device buffer so both grow under load
+        return min(max(self.buffer // 2, 256), 2048)
+
+    @property
+    def buffer_latency(self):
+        return self.buffer / self.frequency
+
+    @property
+    def latency(self):
+        # Device buffer plus the time mixed blocks really spend queued
+        return self.buffer_latency + self.block_size / self.frequency + self.queue_wait
+
+    def record_underrun(self):
+        self.underruns += 1
+        self.window_underruns += 1
+
+    def record_queue_wait(self, seconds):
+        self.queue_wait = 0.9 * self.queue_wait + 0.1 * seconds
+        stats.set("audio latency seconds", self.latency)
+
+    def adapt(self, budget_ratio):
+        # Returns True when the buffer changed and the device must be reopened
+        now = time.monotonic()
+        if now - self.last_adapt < ADAPT_INTERVAL:
+            return False
+        self.last_adapt = now
+        underruns, self.window_underruns = self.window_underruns, 0
+        buffer = self.buffer
+        if underruns or budget_ratio > 0.5:
+            buffer = min(self.buffer * 2, self.max_buffer)
+        elif now - self.last_change > CALM_SECONDS and budget_ratio < 0.2:
+            buffer = max(self.buffer // 2, self.min_buffer)
+        if buffer == self.buffer:
+            return False
+        print(f"Audio buffer {self.buffer} -> {buffer} frames "
+              f"({underruns} underruns, {budget_ratio:.0%} of block budget)")
+        self.buffer = buffer
+        self.last_change = now
+        self.save_buffer()
+        return True
+
+    def publish(self):
+        # Buffer, latency and reinit count for the stats overlay, dump and /metrics
+        stats.set("audio buffer frames", self.buffer)
+        stats.set("audio block frames", self.block_size)
+        stats.set("audio latency seconds", self.latency)
+        stats.set("audio output reinits", self.reinits)
+
+    def stats(self):
+        return {
+            "frequency": self.frequency,
+            "channels": self.channels,
+            "buffer": self.buffer,
+            "block_size": self.block_size,
+            "latency_ms": self.latency * 1000,
+            "underruns": self.underruns,
+            "reinits": self.reinits,
+        }
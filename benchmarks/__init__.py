@@ -0,0 +1,2 @@
+# Playback benchmarks over locally generated, deterministic test media.
+# Run from the repository root with: python -m benchmarks.run
@@ -0,0 +1,216 @@
+import argparse
+import json
+import math
+import os
+import time
+import wave
+import numpy as np
+
+from benchmarks.synthetic_media import DEFAULT_DIR, SAMPLE_RATE, MediaCase, generate
+
+# A white flash frame and a 1 kHz beep start together at every marker
+MARKER_FIRST = 0.5
+MARKER_SPACING = 1.0
+BEEP_SECONDS = 0.05
+FLASH_LEVEL = 200
+# Harness script: (seconds after start, action, argument)
+DEFAULT_SCRIPT = [(6.0, "pause", None), (7.5, "resume", None), (12.0, "seek", 20.0)]
+
+
+def marker_times(duration):
+    count = int((duration - MARKER_FIRST) / MARKER_SPACING) + 1
+    return [MARKER_FIRST + i * MARKER_SPACING for i in range(count)]
+
+
+def sync_frames(fps):
+    flash_frames = None
+
+    def frames(index, width, height):
+        nonlocal flash_frames
+        if flash_frames is None:
+            flash_frames = {int(round(t * fps)) for t in marker_times(3600)}
+        value = 255 if index in flash_frames else 32
+        return np.full((height, width, 3), value, np.uint8)
+    return frames
+
+
+def sync_tone(path, duration):
+    samples = np.zeros(int(duration * SAMPLE_RATE), np.float32)
+    beep = np.sin(2 * math.pi * 1000 * np.arange(int(BEEP_SECONDS * SAMPLE_RATE)) / SAMPLE_RATE)
+    for t in marker_times(duration):
+        start = int(t * SAMPLE_RATE)
+        samples[start:start + len(beep)] = beep[:len(samples) - start]
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((samples * 0.5 * 32767).astype(np.int16).tobytes())
+
+
+class AudioChunkRecorder:
+    # The engine mixes the soundtrack as one MixerSource, block by block, and
+    # queues each block on a pygame channel. Wrapping that source's read and
+    # make_sound tells us each block's media range; polling the channel tells
+    # us when it started playing, and the device buffer when it was heard.
+    # It is the source really mixed, so the ranges follow pause, resume and seek
+    def __init__(self, source, latency=0.0):
+        import pygame
+        from audio_mixer import SAMPLE_RATE as MIXER_RATE
+        self.pygame = pygame
+        self.source = source
+        self.latency = latency
+        self.pending_range = None
+        self.ranges = {}
+        self.played = []  # (media start, media end, perf_counter when it started)
+        self.current = None
+        self.original_make_sound = pygame.sndarray.make_sound
+        original_read = source.read
+
+        def read(frames):
+            start = source.position
+            chunk = original_read(frames)
+            if len(chunk) and source.position > start:
+                self.pending_range = (start / MIXER_RATE, source.position / MIXER_RATE)
+            return chunk
+
+        def make_sound(array):
+            sound = self.original_make_sound(array)
+            if self.pending_range:
+                self.ranges[id(sound)] = (sound, self.pending_range)
+                self.pending_range = None
+            return sound
+
+        source.read = read
+        pygame.sndarray.make_sound = make_sound
+
+    def poll(self):
+        if not self.pygame.mixer.get_init():
+            return
+        sound = self.pygame.mixer.Channel(0).get_sound()
+        if sound is not None and sound is not self.current:
+            self.current = sound
+            entry = self.ranges.pop(id(sound), None)
+            if entry:
+                self.played.append((entry[1][0], entry[1][1], time.perf_counter()))
+
+    def played_time(self, media_time, pauses):
+        for start, end, wall in self.played:
+            if start <= media_time <= end:
+                played = wall + self.latency + (media_time - start)
+                # Time spent paused between the chunk starting and the beep
+                for paused_at, resumed_at in pauses:
+                    if wall <= paused_at < played:
+                        played += resumed_at - paused_at
+                return played
+        return None
+
+    def restore(self):
+        self.pygame.sndarray.make_sound = self.original_make_sound
+        del self.source.read
+
+
+def summarize(offsets):
+    if not offsets:
+        return {"count": 0}
+    values = sorted(offsets)
+    return {
+        "count": len(values),
+        "mean_ms": sum(values) / len(values) * 1000,
+        "p50_ms": values[len(values) // 2] * 1000,
+        "p95_ms": values[min(int(0.95 * len(values)), len(values) - 1)] * 1000,
+        "max_abs_ms": max(abs(v) for v in values) * 1000,
+    }
+
+
+def run(path, duration, script=DEFAULT_SCRIPT, backends=None):
+    # Real VideoThread and audio path, offscreen Qt and SDL's dummy audio device
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    import playback_backends
+    from playback_engine import get_audio_output
+    from playerfinal import VideoThread
+
+    thread = VideoThread()
+    candidates = [b for b in playback_backends.BACKENDS if b.name in backends] if backends else None
+    if not thread.set_video(path, candidates):
+        raise RuntimeError(f"cannot open {path}")
+    soundtrack = thread.engine.soundtrack
+    recorder = AudioChunkRecorder(soundtrack, get_audio_output().buffer_latency) if soundtrack else None
+    flashes = []  # (marker time, presented perf_counter time, segment)
+    segment = ["start"]
+    pauses = []
+
+    def on_frame(frame, emitted_at, deadline):
+        if frame[::16, ::16].mean() > FLASH_LEVEL:
+            marker = round((thread.current_time - MARKER_FIRST) / MARKER_SPACING)
+            flashes.append((MARKER_FIRST + marker * MARKER_SPACING, emitted_at, segment[0]))
+
+    thread.frame_ready.connect(on_frame)
+    thread.running = True
+    thread.start()
+    started = time.perf_counter()
+    actions = list(script)
+    finished = []
+    thread.playback_finished.connect(lambda: finished.append(True))
+    while not finished and time.perf_counter() - started < duration + 10:
+        elapsed = time.perf_counter() - started
+        if actions and elapsed >= actions[0][0]:
+            _, action, argument = actions.pop(0)
+            if action == "pause":
+                thread.pause()
+                pauses.append([time.perf_counter(), None])
+            elif action == "resume":
+                thread.resume()
+                pauses[-1][1] = time.perf_counter()
+                segment[0] = "after resume"
+            elif action == "seek":
+                thread.seek(argument)
+                segment[0] = "after seek"
+        if recorder:
+            recorder.poll()
+        app.processEvents()
+        time.sleep(0.001)
+    thread.stop()
+    if recorder:
+        recorder.restore()
+
+    samples = []
+    for marker, presented, seg in flashes:
+        played = recorder.played_time(marker, pauses) if recorder else None
+        if played is not None:
+            # Positive: video shown after the beep was played
+            samples.append({"marker_s": marker, "offset_s": presented - played, "segment": seg})
+    segments = {}
+    for sample in samples:
+        segments.setdefault(sample["segment"], []).append(sample["offset_s"])
+    return {
+        "file": path,
+        "script": script,
+        "overall": summarize([s["offset_s"] for s in samples]),
+        "segments": {name: summarize(values) for name, values in segments.items()},
+        "samples": samples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure A/V offset through VideoThread and the audio path")
+    parser.add_argument("--duration", type=int, default=30)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--backend", action="append")
+    parser.add_argument("--media-dir", default=DEFAULT_DIR)
+    parser.add_argument("--output", default="av_sync_results.json")
+    args = parser.parse_args()
+    case = MediaCase("sync", 640, 360, args.fps, args.duration)
+    path = generate(case, args.media_dir, frames=sync_frames(args.fps), tone=sync_tone, tag="avsync_")
+    report = run(path, args.duration, backends=args.backend)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for name, summary in [("overall", report["overall"])] + list(report["segments"].items()):
+        print(f"{name}: {summary}")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
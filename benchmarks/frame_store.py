@@ -0,0 +1,103 @@
+import argparse
+import json
+import time
+import numpy as np
+
+from benchmarks.synthetic_media import frame_pattern
+from frame_cache import FRAME_STORES
+
+BUDGET_MB = 512
+FRAMES = 30
+
+
+def synthetic_frames(width, height, count):
+    # The moving gradient plus sensor-like noise, so zlib is not flattered
+    rng = np.random.default_rng(0)
+    for index in range(count):
+        frame = frame_pattern(index, width, height).astype(np.int16)
+        frame += rng.integers(-3, 4, frame.shape, dtype=np.int16)
+        yield np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def file_frames(path, count):
+    import playback_backends
+    backend = playback_backends.open_backend(path)
+    try:
+        for index in range(count):
+            frame = backend.read_frame(index / backend.fps)
+            if frame is None:
+                break
+            yield frame.copy()
+    finally:
+        backend.close()
+
+
+def psnr(original, restored):
+    error = np.mean((original.astype(np.float32) - restored.astype(np.float32)) ** 2)
+    return float("inf") if error == 0 else float(10 * np.log10(255 ** 2 / error))
+
+
+def measure(store, frames, fps, budget_bytes):
+    encode = decode = 0.0
+    stored = 0
+    quality = []
+    for frame in frames:
+        started = time.perf_counter()
+        entry = store.encode(frame)
+        encode += time.perf_counter() - started
+        started = time.perf_counter()
+        restored = store.decode(entry)
+        decode += time.perf_counter() - started
+        stored += entry.nbytes
+        quality.append(psnr(frame, restored))
+    count = len(frames)
+    per_frame = stored / count
+    return {
+        "format": store.name,
+        "bytes_per_frame": per_frame,
+        "ratio": frames[0].nbytes / per_frame,
+        "encode_ms": encode / count * 1000,
+        "decode_ms": decode / count * 1000,
+        # Share of one core spent decompressing while re-playing from the cache
+        "decode_core_share": decode / count * fps,
+        "min_psnr_db": min(quality),
+        "frames_in_budget": int(budget_bytes // per_frame),
+        "seconds_in_budget": budget_bytes / per_frame / fps,
+    }
+
+
+def run(width=1920, height=1080, fps=30, count=FRAMES, path=None, budget_mb=BUDGET_MB):
+    frames = list(file_frames(path, count) if path else synthetic_frames(width, height, count))
+    if not frames:
+        raise RuntimeError("no frames to measure")
+    budget = budget_mb * 1024 * 1024
+    return {
+        "source": path or f"synthetic {width}x{height}",
+        "frame_shape": list(frames[0].shape),
+        "budget_mb": budget_mb,
+        "results": [measure(store(), frames, fps, budget) for store in FRAME_STORES.values()],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame cache capacity against CPU cost per store format")
+    parser.add_argument("--file", help="decode frames from this video instead of synthetic ones")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--budget-mb", type=int, default=BUDGET_MB)
+    parser.add_argument("--output", default="frame_store_results.json")
+    args = parser.parse_args()
+    report = run(args.width, args.height, args.fps, args.frames, args.file, args.budget_mb)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for result in report["results"]:
+        print(f"{result['format']}: {result['seconds_in_budget']:.1f} s in {args.budget_mb} MB, "
+              f"encode {result['encode_ms']:.1f} ms, decode {result['decode_ms']:.1f} ms, "
+              f"PSNR {result['min_psnr_db']:.1f} dB")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+from benchmarks.synthetic_media import DEFAULT_DIR, FULL_CASES, QUICK_CASES, generate_all
+
+SUSTAIN_SECONDS = 5.0
+SEEK_FRACTIONS = (0.1, 0.5, 0.9, 0.3, 0.7)
+
+qt_app = None  # kept for the life of the measuring process
+
+
+def peak_rss_bytes():
+    try:
+        import resource
+    except ImportError:
+        return peak_working_set_bytes()
+    # ru_maxrss is the peak, in kB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def peak_working_set_bytes():
+    # Windows has no resource module; its peak working set is the same figure.
+    # None where neither is available
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                    "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                    "PagefileUsage", "PeakPagefileUsage")]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize
+    except Exception as e:
+        print(f"Error reading peak memory: {e}")
+        return None
+
+
+def wait_for_qt_frame(backend, seen, timeout=5.0):
+    # QtMultimedia decodes on its own threads; pump events until a new frame lands
+    from PyQt6.QtCore import QCoreApplication
+    started = time.perf_counter()
+    while backend.frames_received <= seen and time.perf_counter() - started < timeout:
+        QCoreApplication.processEvents()
+    return backend.frames_received > seen
+
+
+def first_frame(backend):
+    if backend.name == "qtmultimedia":
+        backend.audio_output.setMuted(True)
+        backend.player.play()
+        return wait_for_qt_frame(backend, backend.frames_received)
+    return backend.read_frame(0.0) is not None
+
+
+def sustained_decode(backend):
+    # Frames decoded as fast as the backend allows, and CPU per media second
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    frames = 0
+    if backend.name == "qtmultimedia":
+        backend.player.setPlaybackRate(8.0)
+        seen = backend.frames_received
+        while time.perf_counter() - started < SUSTAIN_SECONDS:
+            if not wait_for_qt_frame(backend, backend.frames_received, timeout=1.0):
+                break
+        frames = backend.frames_received - seen
+        backend.player.setPlaybackRate(1.0)
+    else:
+        while time.perf_counter() - started < SUSTAIN_SECONDS:
+            if backend.read_frame(frames / backend.fps) is None:
+                break
+            frames += 1
+    elapsed = time.perf_counter() - started
+    media_seconds = frames / backend.fps if backend.fps else 0
+    cpu = time.process_time() - cpu_started
+    return {
+        "frames": frames,
+        "decode_fps": frames / elapsed if elapsed else 0.0,
+        "realtime_factor": media_seconds / elapsed if elapsed else 0.0,
+        "cpu_per_playback_second": cpu / media_seconds if media_seconds else None,
+    }
+
+
+def seek_latencies(backend):
+    latencies = []
+    for fraction in SEEK_FRACTIONS:
+        position = backend.duration * fraction
+        started = time.perf_counter()
+        backend.seek(position)
+        if backend.name == "qtmultimedia":
+            ok = wait_for_qt_frame(backend, backend.frames_received)
+        else:
+            ok = backend.read_frame(position) is not None
+        if ok:
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def measure(backend_name, path, next_path):
+    # Runs in a fresh process so peak RSS belongs to this backend and file only
+    global qt_app
+    if backend_name == "qtmultimedia":
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt6.QtCore import QCoreApplication
+        qt_app = QCoreApplication.instance() or QCoreApplication([])
+    import playback_backends
+    backend_class = {b.name: b for b in playback_backends.BACKENDS}[backend_name]
+    result = {"backend": backend_name}
+    try:
+        started = time.perf_counter()
+        backend = backend_class()
+        backend.open(path)
+        if not first_frame(backend):
+            raise RuntimeError("no first frame")
+        result["time_to_first_frame_s"] = time.perf_counter() - started
+        result.update(sustained_decode(backend))
+        latencies = sorted(seek_latencies(backend))
+        result["seek_latency_s"] = {
+            "median": latencies[len(latencies) // 2] if latencies else None,
+            "max": latencies[-1] if latencies else None,
+        }
+        # Track switch: close this file and get the first frame of the next one
+        started = time.perf_counter()
+        backend.close()
+        backend = backend_class()
+        backend.open(next_path)
+        first_frame(backend)
+        result["track_switch_gap_s"] = time.perf_counter() - started
+        backend.close()
+    except Exception as e:
+        result["error"] = str(e)
+    result["peak_rss_bytes"] = peak_rss_bytes()
+    return result
+
+
+def host_info():
+    import playback_backends
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "backends": [b.name for b in playback_backends.BACKENDS if b.available()],
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run(cases, backends=None, media_dir=DEFAULT_DIR):
+    import playback_backends
+    available = [b.name for b in playback_backends.BACKENDS if b.available()]
+    backends = [b for b in (backends or available) if b in available]
+    media = generate_all(cases, media_dir)
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for i, (case, path) in enumerate(media):
+        next_path = media[(i + 1) % len(media)][1]
+        for backend in backends:
+            with context.Pool(1) as pool:
+                result = pool.apply(measure, (backend, path, next_path))
+            result["media"] = case.as_dict()
+            results.append(result)
+            print(f"{case.filename} {backend}: "
+                  + (result.get("error") or f"{result['decode_fps']:.1f} fps, "
+                     f"first frame {result['time_to_first_frame_s'] * 1000:.0f} ms"))
+    return {"host": host_info(), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the playback backends on synthetic media")
+    parser.add_argument("--full", action="store_true", help="run every resolution/codec/fps case")
+    parser.add_argument("--backend", action="append", help="limit to a backend (repeatable)")
+    parser.add_argument("--media-dir", default=DEFAULT_DIR)
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+    report = run(FULL_CASES if args.full else QUICK_CASES, args.backend, args.media_dir)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import math
+import os
+import wave
+import numpy as np
+
+SAMPLE_RATE = 44100
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".mediaplayer", "bench_media")
+
+
+class MediaCase:
+    def __init__(self, name, width, height, fps, duration, codec="libx264", ext="mp4"):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.duration = duration
+        self.codec = codec
+        self.ext = ext
+
+    @property
+    def filename(self):
+        return f"{self.name}_{self.width}x{self.height}_{self.fps}fps_{self.duration}s_{self.codec}.{self.ext}"
+
+    def as_dict(self):
+        return {"name": self.name, "width": self.width, "height": self.height, "fps": self.fps,
+                "duration": self.duration, "codec": self.codec, "container": self.ext}
+
+
+QUICK_CASES = [
+    MediaCase("sd", 640, 360, 30, 5),
+    MediaCase("hd", 1280, 720, 30, 5),
+]
+
+FULL_CASES = QUICK_CASES + [
+    MediaCase("film", 1920, 1080, 24, 10),
+    MediaCase("fhd", 1920, 1080, 30, 10),
+    MediaCase("hfr", 1280, 720, 60, 10),
+    MediaCase("long", 640, 360, 25, 60),
+    MediaCase("mpeg4", 1280, 720, 25, 10, codec="mpeg4", ext="avi"),
+    MediaCase("mjpeg", 1280, 720, 25, 10, codec="mjpeg", ext="avi"),
+    MediaCase("uhd", 3840, 2160, 30, 5),
+]
+
+
+def frame_pattern(index, width, height):
+    # A moving gradient plus a binary frame counter along the top, built with
+    # vectorized numpy so generation stays fast and byte-identical between runs
+    x = np.arange(width, dtype=np.uint16)[None, :]
+    y = np.arange(height, dtype=np.uint16)[:, None]
+    frame = np.empty((height, width, 3), np.uint8)
+    frame[..., 0] = (x + index * 4) & 0xFF
+    frame[..., 1] = (y + index * 2) & 0xFF
+    frame[..., 2] = ((x + y) // 4 + index) & 0xFF
+    bar = max(width // 32, 1)
+    for bit in range(16):
+        frame[:bar, bit * bar:(bit + 1) * bar] = 255 if index >> bit & 1 else 0
+    return frame
+
+
+def write_tone(path, duration, frequency=440.0):
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    samples = (0.3 * np.sin(2 * math.pi * frequency * t) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(samples.tobytes())
+
+
+def generate(case, out_dir=DEFAULT_DIR, frames=frame_pattern, audio=True, tone=write_tone, tag=""):
+    # Encodes the case with the ffmpeg binary that imageio-ffmpeg (a moviepy
+    # dependency) ships; existing files are reused
+    import imageio_ffmpeg
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, tag + case.filename)
+    if os.path.exists(path):
+        return path
+    tone_path = None
+    if audio:
+        tone_path = path + ".wav"
+        tone(tone_path, case.duration)
+    partial = path + ".partial." + case.ext
+    writer = imageio_ffmpeg.write_frames(
+        partial, (case.width, case.height), fps=case.fps, codec=case.codec,
+        macro_block_size=1, audio_path=tone_path, audio_codec="aac" if case.ext == "mp4" else "pcm_s16le",
+        output_params=["-threads", "1"], ffmpeg_log_level="error")
+    writer.send(None)
+    for index in range(int(case.duration * case.fps)):
+        writer.send(frames(index, case.width, case.height))
+    writer.close()
+    os.replace(partial, path)
+    if tone_path:
+        os.remove(tone_path)
+    return path
+
+
+def generate_all(cases, out_dir=DEFAULT_DIR):
+    return [(case, generate(case, out_dir)) for case in cases]
@@ -1,44 +1,83 @@
-import tkinter as tk
-from tkinter import filedialog
-from tkinter.ttk import Progressbar
-import customtkinter as ctk
-from mutagen.mp3 import MP3
+import startup_profile
+import wakeups
+from startup_profile import lazy_import, timed
+
+with timed("import tkinter"):
+    import tkinter as tk
+    from tkinter import filedialog
+    from tkinter.ttk import Progressbar
+    from tkinter import messagebox
+    from tkinter import ttk
+with timed("import customtkinter"):
+    import customtkinter as ctk
 import threading
-import pygame
 import time
 import os
-import cv2  # Import OpenCV for video playback
-from tkinter import messagebox
-from tkinter import ttk
+from collections import deque
+
+# pygame, numpy, mutagen and cv2 are imported on first use, not at start-up
+mixer = None
+song = None  # the playing song's source in the mixer
 
-# Initialize pygame for audio playback
-pygame.mixer.init()
+def init_audio():
+    # Only pygame's mixer is initialised, starting from the buffer size learned
+    # on this host. Songs play through the software mixer, which counts
+    # underruns so the output can grow or shrink its buffer while they play
+    global mixer
+    if mixer is None:
+        audio_output = lazy_import("audio_output").AdaptiveAudioOutput()
+        with timed("pygame.mixer.init"):
+            audio_output.open()
+        mixer = lazy_import("audio_mixer").AudioMixer(output=audio_output)
+    return mixer
 
 # Store the current position of the music
 current_position = 0
 paused = False
 selected_folder_path = ""  # store the selected folder path
 
-# Function to update the progress bar for audio
+# Progress refresh interval while the window is visible and while it is hidden or iconified
+PROGRESS_VISIBLE_MS = 250
+PROGRESS_HIDDEN_MS = 1000
+progress_job = None  # pending after() id, None while the refresh loop is asleep
+shown_position = -1  # last value written to the progress bar
+
+# Function to wake the progress refresh loop when playback starts or resumes
+def schedule_progress(event=None):
+    global progress_job
+    if progress_job is None:
+        progress_job = window.after_idle(update_progress)
+
+# Function to update the progress bar from the Tk main loop
 def update_progress():
-    global current_position
-    while True:
-        if pygame.mixer.music.get_busy() and not paused:
-            current_position = pygame.mixer.music.get_pos() / 1000
-            pbar["value"] = current_position
-            
-            # Check if the current song has reached its maximum duration
-            if current_position >= pbar["maximum"]:
-                stop_music()  # Stop music playback
-                pbar["value"] = 0  # Reset the progress bar
-            
-            window.update()
-        time.sleep(0.1)
-
-# Create a thread to update the progress bar
-pt = threading.Thread(target=update_progress)
-pt.daemon = True
-pt.start()
+    global current_position, progress_job, shown_position
+    progress_job = None
+    wakeups.count("progress refresh")
+    if mixer is None or paused:
+        return  # nothing to show; schedule_progress() wakes the loop again
+    if song is None or song.finished:
+        # The song ended on its own, so reset the bar and go to sleep
+        if shown_position != 0:
+            pbar["value"] = shown_position = 0
+        return
+    current_position = song.time
+
+    # Check if the current song has reached its maximum duration
+    if current_position >= pbar["maximum"]:
+        stop_music()  # Stop music playback
+        pbar["value"] = shown_position = 0  # Reset the progress bar
+        return
+
+    # Only touch the widget once the bar would move by at least a pixel
+    step = float(pbar["maximum"]) / max(pbar.winfo_width(), 1)
+    if abs(current_position - shown_position) >= step:
+        pbar["value"] = shown_position = current_position
+
+    visible = window.winfo_viewable() and window.state() != "iconic"
+    interval = PROGRESS_VISIBLE_MS if visible else PROGRESS_HIDDEN_MS
+    # A pixel of a long song can take longer than the interval to fill
+    interval = max(interval, min(int(step * 1000), PROGRESS_HIDDEN_MS))
+    progress_job = window.after(interval, update_progress)
 
 # Function to select a folder containing music files
 def select_music_folder():
@@ -53,38 +92,51 @@ def select_music_folder():
 # Function to play the selected music
 def play_music():
     global paused
-    if paused:
-        pygame.mixer.music.unpause()  # Unpause music if it was paused
+    if paused and mixer:
+        mixer.resume()  # Unpause music if it was paused
         paused = False
+        schedule_progress()
     else:
         play_selected_song()  # Play the selected song from the listbox
 
 # Function to play the selected song from the listbox
 def play_selected_song():
-    global current_position, paused
+    global current_position, paused, song
     if len(lbox.curselection()) > 0:
         current_index = lbox.curselection()[0]
         selected_song = lbox.get(current_index)
         full_path = os.path.join(selected_folder_path, selected_song)
-        pygame.mixer.music.load(full_path)  # Load the selected song
-        pygame.mixer.music.play(start=current_position)  # Play the song from the current position
+        init_audio()
+        samples = lazy_import("audio_mixer").load_sound(full_path)  # Load the selected song
+        mixer.remove_all()
+        song = mixer.add_source(samples, name=selected_song)
+        mixer.seek(song, current_position)  # Play the song from the current position
+        mixer.start()
+        mixer.resume()
         paused = False
 
         # Get song duration and update progress bar
+        MP3 = lazy_import("mutagen.mp3").MP3
         audio = MP3(full_path)
         song_duration = audio.info.length
         pbar["maximum"] = song_duration
+        schedule_progress()
 
 # Function to pause the current music
 def pause_music():
     global paused
-    pygame.mixer.music.pause()  # Pause the music
+    if mixer is None:
+        return
+    mixer.pause()  # Pause the music
     paused = True
 
 # Function to stop the current music
 def stop_music():
-    global paused
-    pygame.mixer.music.stop()  # Stop music playback
+    global paused, song
+    if mixer is None:
+        return
+    mixer.stop()  # Stop music playback
+    song = None
     paused = False
 
 # Function to play the previous song in the playlist
@@ -111,35 +163,104 @@ def upload_video():
     if video_path:
         play_video(video_path)
 
-# Function to play video with OpenCV
+# Video frames are decoded on a worker thread and shown by the Tk main loop
+VIDEO_WIDTH = 480
+VIDEO_QUEUE_SIZE = 2
+video_frames = deque()  # (pts, ppm bytes) decoded ahead of their deadline
+video_lock = threading.Lock()
+video_stop = None  # Event that stops the current decode worker
+video_start = 0  # monotonic time at which pts 0 is presented
+video_interval = 0.04
+video_photo = None
+dropped_frames = 0
+
+# Function to decode frames on a worker thread, paced by the file's timestamps
+def decode_video(cap, stop):
+    global dropped_frames
+    cv2 = lazy_import("cv2")
+    while not stop.is_set():
+        if not cap.grab():
+            break
+        pts = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        # A frame already a whole interval late is dropped without being retrieved
+        if time.monotonic() - video_start - pts > video_interval:
+            dropped_frames += 1
+            continue
+        ok, frame = cap.retrieve()
+        if not ok:
+            break
+        height = int(frame.shape[0] * VIDEO_WIDTH / frame.shape[1])
+        frame = cv2.resize(frame, (VIDEO_WIDTH, height), interpolation=cv2.INTER_AREA)
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # Tk reads binary PPM directly, so no imaging library is needed
+        ppm = b"P6 %d %d 255 " % (VIDEO_WIDTH, height) + frame.tobytes()
+        # Decode at most a couple of frames ahead of the display
+        while len(video_frames) >= VIDEO_QUEUE_SIZE and not stop.is_set():
+            stop.wait(video_interval / 2)
+        with video_lock:
+            video_frames.append((pts, ppm))
+    cap.release()
+    stop.set()
+
+# Function to show due frames; reschedules itself only while a video is playing
+def show_video_frame(stop):
+    global dropped_frames
+    wakeups.count("video display")
+    now = time.monotonic() - video_start
+    frame = None
+    with video_lock:
+        while video_frames and video_frames[0][0] <= now:
+            pts, ppm = video_frames.popleft()
+            if frame is not None:
+                dropped_frames += 1  # overtaken by a newer due frame
+            frame = ppm
+        next_pts = video_frames[0][0] if video_frames else None
+    if frame is not None:
+        video_photo.configure(data=frame)
+    if stop.is_set() and next_pts is None:
+        if stop is video_stop:
+            video_label.pack_forget()
+        return
+    delay = next_pts - now if next_pts is not None else video_interval / 2
+    window.after(max(1, int(delay * 1000)), show_video_frame, stop)
+
+# Function to play video with OpenCV without blocking the Tk main loop
 def play_video(video_path):
+    global video_stop, video_start, video_interval, video_photo, dropped_frames
+    cv2 = lazy_import("cv2")
     cap = cv2.VideoCapture(video_path)
-    
+
     # Check if the video was opened successfully
     if not cap.isOpened():
         messagebox.showerror("Error", "Unable to open video file.")
         return
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if ret:
-            # Convert frame to RGB (OpenCV uses BGR by default)
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-            # Display video frame in a window
-            cv2.imshow('Video Playback', frame_rgb)
+    stop_video()
+    video_interval = 1 / (cap.get(cv2.CAP_PROP_FPS) or 25.0)
+    video_start = time.monotonic()
+    dropped_frames = 0
+    with video_lock:
+        video_frames.clear()
+    if video_photo is None:
+        video_photo = tk.PhotoImage()
+        video_label.configure(image=video_photo)
+    video_label.pack(pady=10)
+    window.geometry("")  # let the window grow to fit the video
 
-            # Close window when 'q' is pressed
-            if cv2.waitKey(25) & 0xFF == ord('q'):
-                break
-        else:
-            break
+    video_stop = threading.Event()
+    threading.Thread(target=decode_video, args=(cap, video_stop), daemon=True).start()
+    show_video_frame(video_stop)
 
-    cap.release()
-    cv2.destroyAllWindows()
+# Function to stop the current video
+def stop_video():
+    if video_stop is not None:
+        video_stop.set()
+        with video_lock:
+            video_frames.clear()
 
 # Create the main window
-window = tk.Tk()
+with timed("Tk window"):
+    window = tk.Tk()
 window.title("High-End Multimedia Player")
 window.geometry("800x600")
 
@@ -180,4 +301,13 @@ pbar.pack(pady=10)
 btn_upload_video = ctk.CTkButton(window, text="Upload Video", command=upload_video, font=("TkDefaultFont", 18))
 btn_upload_video.pack(pady=20)
 
+# Refresh the progress bar straight away when the window is shown again
+window.bind("<Map>", schedule_progress)
+
+# Label that shows video frames inside the main window, and a key to stop them
+video_label = tk.Label(window)
+window.bind("q", lambda event: stop_video())
+
+# Report once the event loop has drawn the window
+window.after_idle(startup_profile.report)
 window.mainloop()
@@ -0,0 +1,257 @@
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from startup_profile import lazy_import
+from playback_stats import stats
+
+# Byte budget for decoded frames, set with MEDIAPLAYER_FRAME_CACHE_MB (0 disables)
+DEFAULT_BUDGET_MB = 256
+# Frames this close to the playhead are evicted only when nothing else is left
+KEEP_SECONDS = 2.0
+# How cached frames are held, set with MEDIAPLAYER_FRAME_CACHE_FORMAT
+DEFAULT_FORMAT = "raw"
+ZLIB_LEVEL = 1
+# Frames waiting for the compress worker. Newest go first, since the oldest
+# are the next to be evicted; past this many the oldest stay raw
+MAX_PENDING = 32
+
+
+def budget_from_env():
+    try:
+        return int(float(os.environ.get("MEDIAPLAYER_FRAME_CACHE_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_BUDGET_MB * 1024 * 1024
+
+
+class StoredFrame:
+    __slots__ = ("shape", "planes", "nbytes")
+
+    def __init__(self, shape, planes):
+        self.shape = shape
+        self.planes = planes
+        self.nbytes = sum(len(p) if isinstance(p, bytes) else p.nbytes for p in planes)
+
+
+class RawFrames:
+    # Frames as decoded: no CPU cost, 3 bytes per pixel
+    name = "raw"
+    pixel_format = "rgb"
+
+    def encode(self, frame):
+        # Backends may hand out reused buffers, so keep a copy
+        return frame.copy()
+
+    def decode(self, entry):
+        return entry
+
+
+class Yuv420Frames(RawFrames):
+    # BT.601 full-range luma at full resolution and chroma averaged over 2x2
+    # blocks: 1.5 bytes per pixel, lossy in colour only. Luma is fixed-point
+    # uint16 and chroma is worked out at quarter resolution, so both directions
+    # stay cheap at 1080p
+    name = "yuv420"
+
+    def order(self):
+        return (2, 1, 0) if self.pixel_format == "bgr" else (0, 1, 2)
+
+    def encode(self, frame):
+        np = lazy_import("numpy")
+        height, width = frame.shape[:2]
+        # Chroma blocks need even dimensions; the edge row or column is repeated
+        if height % 2 or width % 2:
+            frame = np.pad(frame, ((0, height % 2), (0, width % 2), (0, 0)), mode="edge")
+        r, g, b = (frame[..., c].astype(np.uint16) for c in self.order())
+        y = ((77 * r + 150 * g + 29 * b + 128) >> 8).astype(np.uint8)
+        pairs = frame[0::2].astype(np.uint16) + frame[1::2]
+        blocks = (pairs[:, 0::2] + pairs[:, 1::2]) / np.float32(4)
+        r, g, b = (blocks[..., c] for c in self.order())
+        luma = 0.299 * r + 0.587 * g + 0.114 * b
+        u = np.clip((b - luma) * 0.564 + 128.5, 0, 255).astype(np.uint8)
+        v = np.clip((r - luma) * 0.713 + 128.5, 0, 255).astype(np.uint8)
+        return StoredFrame((height, width, 3), [y, u, v])
+
+    def decode(self, entry):
+        np = lazy_import("numpy")
+        height, width = entry.shape[:2]
+        y, u, v = entry.planes
+        rows, cols = u.shape
+        u = u.astype(np.float32) - 128
+        v = v.astype(np.float32) - 128
+        # Each chroma term is widened to full rows and added to both luma rows of its block
+        luma = y.astype(np.int16).reshape(rows, 2, cols * 2)
+        frame = np.empty((rows, 2, cols * 2, 3), np.uint8)
+        r, g, b = self.order()
+        for channel, term in ((r, 1.403 * v), (g, -0.344 * u - 0.714 * v), (b, 1.773 * u)):
+            term = np.rint(term).astype(np.int16).repeat(2, axis=1)[:, None, :]
+            frame[..., channel] = np.clip(luma + term, 0, 255)
+        frame = frame.reshape(rows * 2, cols * 2, 3)
+        if frame.shape[:2] != (height, width):
+            frame = np.ascontiguousarray(frame[:height, :width])
+        return frame
+
+
+class ZlibFrames(RawFrames):
+    # Lossless: each colour plane is delta-coded along its rows, which turns
+    # smooth picture areas into runs of small values, then deflated at level 1
+    name = "zlib"
+
+    def encode(self, frame):
+        np = lazy_import("numpy")
+        planes = np.ascontiguousarray(frame.transpose(2, 0, 1))
+        delta = planes.copy()
+        delta[..., 1:] = np.diff(planes, axis=2)
+        return StoredFrame(frame.shape, [zlib.compress(delta.tobytes(), ZLIB_LEVEL)])
+
+    def decode(self, entry):
+        np = lazy_import("numpy")
+        height, width, channels = entry.shape
+        delta = np.frombuffer(zlib.decompress(entry.planes[0]), np.uint8).reshape(channels, height, width)
+        # uint8 cumsum wraps exactly like the uint8 diff did
+        planes = np.cumsum(delta, axis=2, dtype=np.uint8)
+        return np.ascontiguousarray(planes.transpose(1, 2, 0))
+
+
+FRAME_STORES = {store.name: store for store in (RawFrames, Yuv420Frames, ZlibFrames)}
+
+
+def store_from_env():
+    name = os.environ.get("MEDIAPLAYER_FRAME_CACHE_FORMAT", DEFAULT_FORMAT).lower()
+    if name not in FRAME_STORES:
+        print(f"Error: unknown frame cache format {name}, using {DEFAULT_FORMAT}")
+        name = DEFAULT_FORMAT
+    return FRAME_STORES[name]()
+
+
+class FrameCache:
+    # Recently decoded frames keyed by frame index, so backward nudges and
+    # re-plays of the last few seconds come from memory instead of the decoder.
+    # A compressing store trades some CPU per hit and miss for more frames per byte.
+    # Frames always go in raw and are charged at raw size; a worker compresses
+    # them afterwards, newest first, and the budget is then charged the
+    # compressed size, so the playback thread never waits on an encode.
+    def __init__(self, budget_bytes=None, keep_seconds=KEEP_SECONDS, store=None):
+        self.budget = budget_from_env() if budget_bytes is None else budget_bytes
+        self.store = store or store_from_env()
+        self.keep_seconds = keep_seconds
+        self.keep_frames = 0
+        self.frames = OrderedDict()  # index -> frame, least recently used first
+        self.resident = 0
+        self.playhead = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.raw = RawFrames()
+        self.pending = OrderedDict()  # indices waiting to be compressed, oldest first
+        self.lock = threading.Lock()
+        self.queued = threading.Condition(self.lock)
+        self.worker = None
+
+    def reset(self, fps, pixel_format="rgb"):
+        # Called for every newly opened file
+        with self.lock:
+            self.store.pixel_format = pixel_format
+            self.frames.clear()
+            self.pending.clear()
+            self.resident = 0
+        self.playhead = 0
+        self.keep_frames = int(self.keep_seconds * (fps or 25.0))
+        self.publish()
+
+    def __contains__(self, index):
+        return index in self.frames
+
+    def get(self, index):
+        with self.lock:
+            self.playhead = index
+            entry = self.frames.get(index)
+            if entry is None:
+                self.misses += 1
+                stats.incr("frame cache misses")
+                return None
+            self.frames.move_to_end(index)
+            self.hits += 1
+        stats.incr("frame cache hits")
+        stats.set("frame cache hit rate", self.hit_rate())
+        # Raw until the worker has compressed it
+        if not isinstance(entry, StoredFrame):
+            return entry
+        with stats.timer("frame cache decompress"):
+            return self.store.decode(entry)
+
+    def put(self, index, frame):
+        # Returns the cached copy, which callers may keep, or None if not cached
+        if index in self.frames:
+            return None
+        entry = self.raw.encode(frame)
+        size = entry.nbytes
+        if size > self.budget:
+            return None
+        with self.lock:
+            while self.resident + size > self.budget:
+                self.evict()
+            self.frames[index] = entry
+            self.resident += size
+            if self.store.name != "raw":
+                self.pending[index] = None
+                if len(self.pending) > MAX_PENDING:
+                    self.pending.popitem(last=False)
+                    stats.incr("frame cache left raw")
+                self.queued.notify()
+                if self.worker is None:
+                    self.worker = threading.Thread(target=self.compress, name="frame cache", daemon=True)
+                    self.worker.start()
+        self.publish()
+        return entry
+
+    def compress(self):
+        while True:
+            with self.lock:
+                while not self.pending:
+                    self.queued.wait()
+                index, _ = self.pending.popitem()
+                frame = self.frames.get(index)
+            if frame is None or isinstance(frame, StoredFrame):
+                continue
+            with stats.timer("frame cache compress"):
+                entry = self.store.encode(frame)
+            with self.lock:
+                # Skipped if the frame was evicted, or the cache reset, meanwhile
+                if self.frames.get(index) is not frame:
+                    continue
+                self.frames[index] = entry
+                self.resident += entry.nbytes - frame.nbytes
+            self.publish()
+
+    def evict(self):
+        # Least recently used first, passing over frames near the playhead
+        victim = next(iter(self.frames))
+        for index in self.frames:
+            if abs(index - self.playhead) > self.keep_frames:
+                victim = index
+                break
+        self.resident -= self.frames.pop(victim).nbytes
+        self.pending.pop(victim, None)
+        self.evictions += 1
+
+    def publish(self):
+        stats.set("frame cache bytes", self.resident)
+        stats.set("frame cache frames", len(self.frames))
+        stats.set("frame cache hit rate", self.hit_rate())
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "frames": len(self.frames),
+            "resident_bytes": self.resident,
+            "budget_bytes": self.budget,
+            "format": self.store.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+            "evictions": self.evictions,
+        }
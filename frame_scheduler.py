@@ -0,0 +1,103 @@
+import time
+from collections import deque
+
+# Sleep until this close to a deadline and spin for the rest; the margin
+# grows to cover the oversleep the OS actually delivers, within these bounds
+MIN_SPIN_MARGIN = 0.0005
+MAX_SPIN_MARGIN = 0.004
+HISTORY = 1000
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class FrameScheduler:
+    def __init__(self, fps, clock=time.perf_counter, sleep=time.sleep, spin=True):
+        self.fps = fps or 25.0
+        self.clock = clock
+        self.sleep = sleep
+        # A simulated clock never oversleeps, so it sleeps to the deadline instead of spinning
+        self.spin = spin
+        # Media seconds per wall-clock second
+        self.rate = 1.0
+        self.origin = clock()
+        self.spin_margin = MAX_SPIN_MARGIN / 2
+        self.oversleep = deque(maxlen=100)
+        # How late the pacing thread woke for each deadline; when the frame
+        # actually reaches the screen is measured by whoever paints it
+        self.errors = deque(maxlen=HISTORY)
+        self.last_presented = None
+        self.cadence_breaks = 0
+        self.frames = 0
+
+    @property
+    def interval(self):
+        return 1 / (self.fps * self.rate)
+
+    def start(self, pts=0.0):
+        # Anchor pts on the monotonic clock; called on play, resume, seek and rate changes
+        self.origin = self.clock() - pts / self.rate
+        self.last_presented = None
+
+    def shift(self, seconds):
+        # Moves the timeline back by `seconds` of media without disturbing the cadence
+        self.origin += seconds / self.rate
+
+    def deadline(self, pts):
+        # When the frame at pts is due, on this scheduler's clock
+        return self.origin + pts / self.rate
+
+    def position(self):
+        return (self.clock() - self.origin) * self.rate
+
+    def frame_index(self, pts):
+        return int(round(pts * self.fps))
+
+    def wait_until(self, pts, sleep=None):
+        # Sleep coarsely, then spin to the deadline. Returns the lateness in
+        # seconds, or None if sleep() reported an interruption (pause, seek, stop)
+        sleep = sleep or self.sleep
+        deadline = self.deadline(pts)
+        remaining = deadline - self.clock() - (self.spin_margin if self.spin else 0.0)
+        if remaining > 0:
+            woke_for = self.clock() + remaining
+            if sleep(remaining):
+                return None
+            self.learn_oversleep(self.clock() - woke_for)
+        while self.clock() < deadline:
+            if not self.spin and sleep(deadline - self.clock()):
+                return None
+        lateness = self.clock() - deadline
+        self.record(lateness)
+        return lateness
+
+    def learn_oversleep(self, overshoot):
+        self.oversleep.append(max(overshoot, 0.0))
+        worst = percentile(sorted(self.oversleep), 0.95)
+        self.spin_margin = min(max(worst + MIN_SPIN_MARGIN, MIN_SPIN_MARGIN), MAX_SPIN_MARGIN)
+
+    def record(self, lateness):
+        now = self.clock()
+        self.errors.append(abs(lateness))
+        # Cadence: consecutive frames should land one interval apart
+        if self.last_presented is not None:
+            if abs(now - self.last_presented - self.interval) > self.interval / 2:
+                self.cadence_breaks += 1
+        self.last_presented = now
+        self.frames += 1
+
+    def stats(self):
+        errors = sorted(self.errors)
+        return {
+            "frames": self.frames,
+            "wakeup_p50_ms": percentile(errors, 0.50) * 1000,
+            "wakeup_p95_ms": percentile(errors, 0.95) * 1000,
+            "wakeup_p99_ms": percentile(errors, 0.99) * 1000,
+            "wakeup_max_ms": (errors[-1] if errors else 0.0) * 1000,
+            "cadence_breaks": self.cadence_breaks,
+            "spin_margin_ms": self.spin_margin * 1000,
+        }
@@ -0,0 +1,77 @@
+import bisect
+import hashlib
+import json
+import os
+import re
+import subprocess
+import threading
+from startup_profile import lazy_import
+
+# One JSON file of keyframe timestamps per media file, keyed by path, size and mtime
+INDEX_DIR = os.path.join(os.path.expanduser("~"), ".mediaplayer", "keyframes")
+PTS_TIME = re.compile(r"pts_time:\s*([0-9.]+)")
+
+
+def media_key(path):
+    # Changes whenever the file is replaced or edited
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def index_path(path):
+    return os.path.join(INDEX_DIR, media_key(path) + ".json")
+
+
+def cached(path):
+    # The stored index, or None if this version of the file was never indexed
+    try:
+        with open(index_path(path)) as f:
+            return json.load(f)["keyframes"]
+    except Exception:
+        return None
+
+
+def scan(path):
+    # ffmpeg with -skip_frame nokey decodes keyframes only, and showinfo
+    # prints each one's timestamp; imageio-ffmpeg ships the binary with moviepy
+    ffmpeg = lazy_import("imageio_ffmpeg").get_ffmpeg_exe()
+    result = subprocess.run(
+        [ffmpeg, "-hide_banner", "-nostats", "-skip_frame", "nokey", "-i", path,
+         "-map", "0:v:0", "-vf", "showinfo", "-f", "null", "-"],
+        capture_output=True, text=True)
+    return sorted({float(m.group(1)) for m in PTS_TIME.finditer(result.stderr)})
+
+
+def build(path):
+    keyframes = scan(path)
+    try:
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        with open(index_path(path), "w") as f:
+            json.dump({"path": path, "keyframes": keyframes}, f)
+    except Exception as e:
+        print(f"Error saving keyframe index: {e}")
+    return keyframes
+
+
+def build_async(path, callback):
+    # Indexing reads the whole file, so it runs beside playback
+    def worker():
+        try:
+            callback(build(path))
+        except Exception as e:
+            print(f"Error indexing keyframes: {e}")
+    thread = threading.Thread(target=worker, name="keyframe index", daemon=True)
+    thread.start()
+    return thread
+
+
+def nearest(keyframes, target, direction):
+    # The keyframe at or before target when moving forward, at or after it when rewinding
+    if not keyframes:
+        return target
+    i = bisect.bisect_right(keyframes, target)
+    if direction > 0:
+        return keyframes[max(i - 1, 0)]
+    i = bisect.bisect_left(keyframes, target)
+    return keyframes[min(i, len(keyframes) - 1)]
@@ -0,0 +1,105 @@
+import os
+import threading
+from playback_stats import stats
+
+# Regions whose raw frames fit in this many MB are decoded into memory once;
+# set with MEDIAPLAYER_LOOP_BUFFER_MB
+DEFAULT_LIMIT_MB = 512
+
+
+def limit_from_env():
+    try:
+        return int(float(os.environ.get("MEDIAPLAYER_LOOP_BUFFER_MB", DEFAULT_LIMIT_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_LIMIT_MB * 1024 * 1024
+
+
+class LoopRegion:
+    # An A-B loop. A worker with its own decoder either decodes the whole
+    # region into memory, so every wrap is served without touching a decoder,
+    # or, for regions over the limit, parks a standby decoder at A that the
+    # engine swaps in at B instead of seeking
+    def __init__(self, backend_class, path, fps, start, end, frame_bytes, limit=None):
+        self.backend_class = backend_class
+        self.path = path
+        self.fps = fps
+        self.start = start
+        self.end = end
+        self.start_index = int(round(start * fps))
+        self.end_index = max(int(round(end * fps)), self.start_index + 1)
+        limit = limit_from_env() if limit is None else limit
+        self.buffered = (self.end_index - self.start_index) * frame_bytes <= limit
+        self.frames = {}
+        self.resident = 0
+        self.standby = None
+        self.running = True
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.fill if self.buffered else self.park,
+                                       args=(None,), name="loop region", daemon=True)
+        self.thread.start()
+
+    @property
+    def length(self):
+        return self.end_index - self.start_index
+
+    def frame(self, index):
+        with self.lock:
+            return self.frames.get(index)
+
+    def fill(self, _):
+        decoder = self.backend_class()
+        try:
+            decoder.open(self.path)
+            for index in range(self.start_index, self.end_index):
+                if not self.running:
+                    break
+                frame = decoder.read_frame(index / self.fps)
+                if frame is None:
+                    break
+                with self.lock:
+                    # Decoders may reuse their buffers
+                    self.frames[index] = frame.copy()
+                    self.resident += frame.nbytes
+                stats.set("loop buffer bytes", self.resident)
+        except Exception as e:
+            print(f"Error buffering loop region: {e}")
+        finally:
+            decoder.close()
+
+    def park(self, decoder):
+        # Seek a decoder to A ahead of time, so the wrap itself costs no seek
+        try:
+            if decoder is None:
+                decoder = self.backend_class()
+                decoder.open(self.path)
+            decoder.seek(self.start_index / self.fps)
+        except Exception as e:
+            print(f"Error pre-seeking loop start: {e}")
+            return
+        with self.lock:
+            if self.running:
+                self.standby = decoder
+                return
+        decoder.close()
+
+    def take_standby(self, current):
+        # The parked decoder, if ready; the one it replaces is parked for the next wrap
+        with self.lock:
+            standby, self.standby = self.standby, None
+        if standby is None:
+            return None
+        self.thread = threading.Thread(target=self.park, args=(current,), name="loop region", daemon=True)
+        self.thread.start()
+        return standby
+
+    def close(self):
+        with self.lock:
+            self.running = False
+        self.thread.join(timeout=2)
+        with self.lock:
+            if self.standby:
+                self.standby.close()
+                self.standby = None
+            self.frames.clear()
+            self.resident = 0
+        stats.set("loop buffer bytes", 0)
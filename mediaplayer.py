@@ -1,41 +1,79 @@
-import tkinter as tk
-from tkinter import filedialog
-from tkinter.ttk import Progressbar
-import customtkinter as ctk
-from mutagen.mp3 import MP3
-import threading
-import pygame
-import time
+import startup_profile
+import wakeups
+from startup_profile import lazy_import, timed
+
+with timed("import tkinter"):
+  import tkinter as tk
+  from tkinter import filedialog
+  from tkinter.ttk import Progressbar
+with timed("import customtkinter"):
+  import customtkinter as ctk
 import os
 
-# Initialize pygame mixer
-pygame.mixer.init()
+# pygame, numpy and mutagen are imported on first playback, not at start-up
+mixer = None
+song = None  # the playing song's source in the mixer
+
+def init_audio():
+  # Only pygame's mixer is initialised, starting from the buffer size learned
+  # on this host. Songs play through the software mixer, which counts
+  # underruns so the output can grow or shrink its buffer while they play
+  global mixer
+  if mixer is None:
+    audio_output = lazy_import("audio_output").AdaptiveAudioOutput()
+    with timed("pygame.mixer.init"):
+      audio_output.open()
+    mixer = lazy_import("audio_mixer").AudioMixer(output=audio_output)
+  return mixer
 
 # Store the current position of the music
 current_position = 0
 paused = False
 selected_folder_path = "" # store the selected folder path
 
+# Progress refresh interval while the window is visible and while it is hidden or iconified
+PROGRESS_VISIBLE_MS = 250
+PROGRESS_HIDDEN_MS = 1000
+progress_job = None  # pending after() id, None while the refresh loop is asleep
+shown_position = -1  # last value written to the progress bar
+
+# Wake the progress refresh loop when playback starts or resumes
+def schedule_progress(event=None):
+  global progress_job
+  if progress_job is None:
+    progress_job = window.after_idle(update_progress)
+
+# Update the progress bar from the Tk main loop
 def update_progress():
-  global current_position
-  while True:
-    if pygame.mixer.music.get_busy() and not paused:
-      current_position = pygame.mixer.music.get_pos() / 1000
-      pbar["value"] = current_position
-      
-      # Check if the current song has reached is maximum duration
-      if current_position >= pbar["maximum"]:
-        stop_music() # Stop the music playback
-        pbar["value"] = 0 # Reset the pbar
-        
-      window.update()
-    time.sleep(0.1)     
-
-# Create a thread to update the progress bar
-pt = threading.Thread(target=update_progress)
-pt.daemon = True
-pt.start()  
-    
+  global current_position, progress_job, shown_position
+  progress_job = None
+  wakeups.count("progress refresh")
+  if mixer is None or paused:
+    return  # nothing to show; schedule_progress() wakes the loop again
+  if song is None or song.finished:
+    # The song ended on its own, so reset the bar and go to sleep
+    if shown_position != 0:
+      pbar["value"] = shown_position = 0
+    return
+  current_position = song.time
+
+  # Check if the current song has reached its maximum duration
+  if current_position >= pbar["maximum"]:
+    stop_music()  # Stop music playback
+    pbar["value"] = shown_position = 0  # Reset the progress bar
+    return
+
+  # Only touch the widget once the bar would move by at least a pixel
+  step = float(pbar["maximum"]) / max(pbar.winfo_width(), 1)
+  if abs(current_position - shown_position) >= step:
+    pbar["value"] = shown_position = current_position
+
+  visible = window.winfo_viewable() and window.state() != "iconic"
+  interval = PROGRESS_VISIBLE_MS if visible else PROGRESS_HIDDEN_MS
+  # A pixel of a long song can take longer than the interval to fill
+  interval = max(interval, min(int(step * 1000), PROGRESS_HIDDEN_MS))
+  progress_job = window.after(interval, update_progress)
+
 def select_music_folder():
   global selected_folder_path
   selected_folder_path = filedialog.askdirectory()
@@ -63,43 +101,57 @@ def next_song():
       
 def play_music():
   global paused
-  if paused:
+  if paused and mixer:
     # If the music is paused, unpause it
-    pygame.mixer.music.unpause()
+    mixer.resume()
     paused = False
+    schedule_progress()
     
   else:  
     # If the music is not paused, play the selected song
     play_selected_song()
 
 def play_selected_song():
-  global current_position, paused
+  global current_position, paused, song
   if len(lbox.curselection()) > 0 :
     current_index = lbox.curselection()[0]
     selected_song = lbox.get(current_index)
     full_path = os.path.join(selected_folder_path, selected_song) # Add the full path again
-    pygame.mixer.music.load(full_path) # Load the selected song
-    pygame.mixer.music.play(start=current_position) # PLay song from the current position
+    init_audio()
+    samples = lazy_import("audio_mixer").load_sound(full_path) # Load the selected song
+    mixer.remove_all()
+    song = mixer.add_source(samples, name=selected_song)
+    mixer.seek(song, current_position) # PLay song from the current position
+    mixer.start()
+    mixer.resume()
     paused = False
+    MP3 = lazy_import("mutagen.mp3").MP3
     audio = MP3(full_path)
     song_duration = audio.info.length
     pbar["maximum"] = song_duration # Set the maximum value of the pbar to the song duration
+    schedule_progress()
 
 def pause_music():
   global paused
+  if mixer is None:
+    return
   # Pause the currently playing music 
-  pygame.mixer.music.pause()
+  mixer.pause()
   paused = True
 
 def stop_music():
-  global paused
+  global paused, song
+  if mixer is None:
+    return
   # Stop the current playing music and reset the progress bar
-  pygame.mixer.music.stop()
+  mixer.stop()
+  song = None
   paused = False
    
 # create the main  window
 
-window = tk.Tk()
+with timed("Tk window"):
+  window = tk.Tk()
 window.title("Media Player")
 window.geometry("600x500")
 
@@ -140,4 +192,9 @@ btn_next.pack(side=tk.LEFT,padx=5)
 pbar = Progressbar(window, length=300, mode="determinate")
 pbar.pack(pady=10)
 
+# Refresh the progress bar straight away when the window is shown again
+window.bind("<Map>", schedule_progress)
+
+# Report once the event loop has drawn the window
+window.after_idle(startup_profile.report)
 window.mainloop()
\ No newline at end of file
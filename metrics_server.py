@@ -0,0 +1,143 @@
+import os
+import re
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from playback_stats import stats
+
+# Opt in with MEDIAPLAYER_METRICS_PORT=<port>; only ever bound to localhost
+ENV_VAR = "MEDIAPLAYER_METRICS_PORT"
+PREFIX = "mediaplayer_"
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def metric_name(name):
+    return PREFIX + re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def resident_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        import resource
+        # ru_maxrss is the peak, in kB on Linux and bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+class MetricsCollector:
+    # Everything is read from the stats registry at scrape time, so the
+    # playback loops pay nothing for the endpoint
+    def __init__(self, registry=stats):
+        self.registry = registry
+        self.last_scrape = None
+
+    def decode_fps(self):
+        decode = self.registry.histograms.get("decode")
+        frames = decode.count if decode else 0
+        now = time.monotonic()
+        fps = 0.0
+        if self.last_scrape:
+            last_time, last_frames = self.last_scrape
+            if now > last_time:
+                fps = (frames - last_frames) / (now - last_time)
+        self.last_scrape = (now, frames)
+        return fps
+
+    def render(self):
+        lines = []
+
+        def add(name, kind, samples):
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+
+        decode = self.registry.histograms.get("decode")
+        add(metric_name("frames decoded total"), "counter",
+            [f"{metric_name('frames decoded total')} {decode.count if decode else 0}"])
+        add(metric_name("decode fps"), "gauge", [f"{metric_name('decode fps')} {self.decode_fps():.3f}"])
+        for name, value in list(self.registry.counters.items()):
+            metric = metric_name(name + " total")
+            add(metric, "counter", [f"{metric} {value}"])
+        for name, value in list(self.registry.gauges.items()):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                # Non-numeric gauges such as the current file become info labels
+                if isinstance(value, str):
+                    metric = metric_name(name + " info")
+                    add(metric, "gauge", [f"{metric}{{value=\"{label_value(value)}\"}} 1"])
+                continue
+            metric = metric_name(name)
+            add(metric, "gauge", [f"{metric} {value}"])
+        for name, histogram in list(self.registry.histograms.items()):
+            metric = metric_name(name + " seconds")
+            samples = [f"{metric}{{quantile=\"{q}\"}} {histogram.percentile(q)}" for q in QUANTILES]
+            samples.append(f"{metric}_sum {histogram.total}")
+            samples.append(f"{metric}_count {histogram.count}")
+            add(metric, "summary", samples)
+        add(metric_name("resident memory bytes"), "gauge",
+            [f"{metric_name('resident memory bytes')} {resident_bytes()}"])
+        return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    collector = None
+
+    def do_GET(self):
+        if self.path not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.collector.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(port, host="127.0.0.1", registry=stats):
+    # Serves /metrics from a daemon thread; port 0 picks a free port
+    handler = type("BoundMetricsHandler", (MetricsHandler,), {"collector": MetricsCollector(registry)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics server", daemon=True).start()
+    return server
+
+
+def start_from_env():
+    port = os.environ.get(ENV_VAR)
+    if not port:
+        return None
+    try:
+        server = start(int(port))
+        print(f"Serving playback metrics on http://127.0.0.1:{server.server_address[1]}/metrics")
+        return server
+    except Exception as e:
+        print(f"Error starting metrics server: {e}")
+        return None
+
+
+def scrape(url, timeout=2.0):
+    # Minimal stand-in for a Prometheus scraper: returns {sample: value}
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        text = response.read().decode()
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            sample, _, value = line.rpartition(" ")
+            samples[sample] = float(value)
+    return samples
+
+
+if __name__ == "__main__":
+    for sample, value in sorted(scrape(sys.argv[1] if len(sys.argv) > 1 else
+                                       "http://127.0.0.1:9464/metrics").items()):
+        print(f"{sample} {value}")
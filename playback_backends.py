@@ -0,0 +1,380 @@
+import importlib.util
+import json
+import os
+import threading
+import time
+from startup_profile import lazy_import
+
+BENCHMARK_FRAMES = 30
+BENCHMARK_SECONDS = 1.0
+# QMediaPlayer delivers its first frame some time after play(); read_frame
+# waits this long for it rather than report the end of the file
+FIRST_FRAME_SECONDS = 5.0
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".mediaplayer", "backends.json")
+
+
+class PlaybackBackend:
+    name = "base"
+    requires = None
+    # Backends that drive their own audio output set this so callers don't
+    # start a second audio path
+    plays_audio = False
+    # Channel order of the frames read_frame returns
+    pixel_format = "rgb"
+    # read_frame(t) returns exactly the frame at t, so decoded frames can be cached
+    random_access = True
+    # read_frame overwrites earlier frames' memory, so anything kept longer must be copied
+    reuses_buffers = False
+
+    def __init__(self):
+        self.path = None
+        self.fps = 0
+        self.duration = 0
+        self.size = (0, 0)
+        self.playing = False
+        self.clock_origin = 0.0
+        self.clock_offset = 0.0
+
+    @classmethod
+    def available(cls):
+        return cls.requires is None or importlib.util.find_spec(cls.requires) is not None
+
+    def open(self, path):
+        raise NotImplementedError
+
+    def read_frame(self, t=None):
+        # Returns an RGB numpy frame for time t (or the current position), or None at the end
+        raise NotImplementedError
+
+    def audio_clip(self):
+        # A moviepy audio clip for callers that play the soundtrack themselves
+        try:
+            return lazy_import("moviepy.audio.io.AudioFileClip").AudioFileClip(self.path)
+        except Exception:
+            return None
+
+    def close(self):
+        pass
+
+    # The default clock is a monotonic wall clock for backends without their
+    # own; the engine swaps in its clock so simulated playback stays in step
+    clock = staticmethod(time.monotonic)
+
+    def play(self):
+        if not self.playing:
+            self.clock_origin = self.clock()
+            self.playing = True
+
+    def pause(self):
+        if self.playing:
+            self.clock_offset = self.position()
+            self.playing = False
+
+    def seek(self, seconds):
+        self.clock_offset = min(max(seconds, 0), self.duration)
+        self.clock_origin = self.clock()
+
+    def position(self):
+        if self.playing:
+            return self.clock_offset + self.clock() - self.clock_origin
+        return self.clock_offset
+
+
+class MoviePyBackend(PlaybackBackend):
+    name = "moviepy"
+    requires = "moviepy"
+
+    def __init__(self):
+        super().__init__()
+        self.clip = None
+
+    def open(self, path):
+        self.path = path
+        # Not moviepy.editor: that imports moviepy's preview module, which runs
+        # pygame.init() and opens a display caption the moment it is imported
+        self.clip = lazy_import("moviepy.video.io.VideoFileClip").VideoFileClip(path)
+        self.fps = self.clip.fps
+        self.duration = self.clip.duration
+        self.size = tuple(self.clip.size)
+
+    def read_frame(self, t=None):
+        t = self.position() if t is None else t
+        if t >= self.duration:
+            return None
+        return self.clip.get_frame(t)
+
+    def audio_clip(self):
+        return self.clip.audio
+
+    def close(self):
+        if self.clip:
+            self.clip.close()
+            self.clip = None
+
+
+# Decoded frames stay valid until this many newer ones have been decoded
+FRAME_RING_SIZE = 4
+
+
+class OpenCVBackend(PlaybackBackend):
+    name = "opencv"
+    requires = "cv2"
+    # Frames stay in OpenCV's native BGR order and are shown as BGR888 images,
+    # so no colour conversion happens per frame
+    pixel_format = "bgr"
+    reuses_buffers = True
+
+    def __init__(self):
+        super().__init__()
+        self.cap = None
+        self.next_index = 0
+        self.ring = []
+        self.ring_index = 0
+        self.frames_decoded = 0
+        self.frames_skipped = 0
+        # The frame at next_index - 1, so asking for it again costs nothing
+        self.last_frame = None
+
+    def open(self, path):
+        cv2 = lazy_import("cv2")
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"OpenCV cannot open {path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 25.0
+        frame_count = self.cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        self.duration = frame_count / self.fps if frame_count > 0 else 0
+        self.size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                     int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self.next_index = 0
+        self.last_frame = None
+        np = lazy_import("numpy")
+        width, height = self.size
+        self.ring = [np.empty((height, width, 3), np.uint8) for _ in range(FRAME_RING_SIZE)]
+
+    def seek(self, seconds):
+        super().seek(seconds)
+        cv2 = lazy_import("cv2")
+        self.cap.set(cv2.CAP_PROP_POS_MSEC, self.clock_offset * 1000)
+        self.next_index = int(round(self.clock_offset * self.fps))
+        self.last_frame = None
+
+    def read_frame(self, t=None):
+        cv2 = lazy_import("cv2")
+        # Sequential reads are cheap; only seek when t moves backwards or a
+        # second or more ahead, otherwise catch up with grab() which skips the
+        # colour conversion and copy that retrieve() would do
+        if t is not None:
+            # Rounded: i / fps * fps can land just below i
+            wanted = int(round(t * self.fps))
+            if wanted == self.next_index - 1 and self.last_frame is not None:
+                return self.last_frame
+            if wanted < self.next_index or wanted > self.next_index + int(self.fps):
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, wanted)
+                self.next_index = wanted
+            while self.next_index < wanted:
+                if not self.cap.grab():
+                    return None
+                self.next_index += 1
+                self.frames_skipped += 1
+        buffer = self.ring[self.ring_index] if self.ring else None
+        ok, frame = self.cap.read(buffer)
+        if not ok:
+            return None
+        self.ring_index = (self.ring_index + 1) % max(len(self.ring), 1)
+        self.next_index += 1
+        self.frames_decoded += 1
+        self.last_frame = frame
+        return frame
+
+    def close(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+
+class QtMultimediaBackend(PlaybackBackend):
+    name = "qtmultimedia"
+    requires = "PyQt6.QtMultimedia"
+    plays_audio = True
+    # Frames are whatever QMediaPlayer last delivered, not the one asked for
+    random_access = False
+
+    def __init__(self):
+        super().__init__()
+        self.player = None
+        self.audio_output = None
+        self.sink = None
+        self.latest_image = None
+        self.frames_received = 0
+        self.first_frame = threading.Event()
+
+    def open(self, path):
+        QtMultimedia = lazy_import("PyQt6.QtMultimedia")
+        QUrl = lazy_import("PyQt6.QtCore").QUrl
+        self.path = path
+        self.player = QtMultimedia.QMediaPlayer()
+        self.audio_output = QtMultimedia.QAudioOutput()
+        self.player.setAudioOutput(self.audio_output)
+        self.sink = QtMultimedia.QVideoSink()
+        self.sink.videoFrameChanged.connect(self.on_frame)
+        self.player.setVideoSink(self.sink)
+        self.player.setSource(QUrl.fromLocalFile(path))
+        # Loading is asynchronous; wait for the metadata before reporting duration
+        QCoreApplication = lazy_import("PyQt6.QtCore").QCoreApplication
+        Status = QtMultimedia.QMediaPlayer.MediaStatus
+        started = time.perf_counter()
+        while self.player.mediaStatus() not in (Status.LoadedMedia, Status.InvalidMedia):
+            if time.perf_counter() - started > 5:
+                break
+            QCoreApplication.processEvents()
+        if self.player.mediaStatus() == Status.InvalidMedia:
+            raise IOError(f"QtMultimedia cannot open {path}")
+        self.duration = self.player.duration() / 1000
+        rate = self.player.metaData().value(QtMultimedia.QMediaMetaData.Key.VideoFrameRate)
+        self.fps = float(rate) if rate else 25.0
+
+    def on_frame(self, frame):
+        # The sink also reports an invalid frame when playback stops
+        if not frame.isValid():
+            return
+        self.frames_received += 1
+        self.latest_image = frame.toImage()
+        self.first_frame.set()
+
+    # QMediaPlayer lives on the GUI thread, so calls from decode threads are queued to it
+    def invoke(self, method, *args):
+        QtCore = lazy_import("PyQt6.QtCore")
+        QtCore.QMetaObject.invokeMethod(self.player, method,
+                                        QtCore.Qt.ConnectionType.QueuedConnection, *args)
+
+    def play(self):
+        self.invoke("play")
+        self.playing = True
+
+    def pause(self):
+        self.invoke("pause")
+        self.playing = False
+
+    def seek(self, seconds):
+        QtCore = lazy_import("PyQt6.QtCore")
+        self.invoke("setPosition", QtCore.Q_ARG("qint64", int(seconds * 1000)))
+
+    def position(self):
+        return self.player.position() / 1000
+
+    def read_frame(self, t=None):
+        np = lazy_import("numpy")
+        QImage = lazy_import("PyQt6.QtGui").QImage
+        if t is not None and t >= self.duration:
+            return None
+        # None means the end of the file to callers, so the wait for the
+        # first frame after opening is done here
+        if self.latest_image is None and not self.first_frame.wait(FIRST_FRAME_SECONDS):
+            return None
+        image = self.latest_image.convertToFormat(QImage.Format.Format_RGB888)
+        buffer = image.constBits()
+        buffer.setsize(image.sizeInBytes())
+        rows = np.frombuffer(buffer, np.uint8).reshape(image.height(), image.bytesPerLine())
+        return rows[:, :image.width() * 3].reshape(image.height(), image.width(), 3).copy()
+
+    def audio_clip(self):
+        return None
+
+    def close(self):
+        if self.player:
+            self.player.stop()
+            self.player = None
+            self.sink = None
+
+
+BACKENDS = [OpenCVBackend, MoviePyBackend, QtMultimediaBackend]
+
+
+def probe_format(path):
+    # Container from the extension, codec from the stream's FourCC when OpenCV is around
+    container = os.path.splitext(path)[1].lower().lstrip(".")
+    codec = ""
+    if OpenCVBackend.available():
+        try:
+            cv2 = lazy_import("cv2")
+            cap = cv2.VideoCapture(path)
+            fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+            cap.release()
+            codec = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip().lower()
+        except Exception as e:
+            print(f"Error probing codec: {e}")
+    return f"{container}/{codec}" if codec else container
+
+
+def benchmark_backend(backend_class, path):
+    # Real-time factor: decoded frames per second over the file's own frame rate
+    backend = backend_class()
+    try:
+        backend.open(path)
+        if backend_class is QtMultimediaBackend:
+            QCoreApplication = lazy_import("PyQt6.QtCore").QCoreApplication
+            backend.audio_output.setMuted(True)
+            backend.player.setPlaybackRate(8.0)
+            backend.player.play()
+            started = time.perf_counter()
+            while time.perf_counter() - started < BENCHMARK_SECONDS:
+                QCoreApplication.processEvents()
+            frames = backend.frames_received
+        else:
+            started = time.perf_counter()
+            frames = 0
+            for i in range(BENCHMARK_FRAMES):
+                if backend.read_frame(i / backend.fps) is None:
+                    break
+                frames += 1
+        elapsed = time.perf_counter() - started
+        return frames / elapsed / backend.fps if frames and backend.fps else 0.0
+    except Exception as e:
+        print(f"Error benchmarking {backend_class.name}: {e}")
+        return 0.0
+    finally:
+        backend.close()
+
+
+def load_cache():
+    try:
+        with open(CACHE_PATH) as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def save_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        with open(CACHE_PATH, "w") as f:
+            json.dump(cache, f, indent=2)
+    except Exception as e:
+        print(f"Error saving backend benchmark: {e}")
+
+
+def select_backend(path, candidates=None):
+    # The first file of each container/codec is benchmarked on this host and
+    # the winner is remembered for every later file of that format
+    candidates = [b for b in (candidates or BACKENDS) if b.available()]
+    if not candidates:
+        raise RuntimeError("No playback backend is installed")
+    by_name = {b.name: b for b in candidates}
+    key = probe_format(path)
+    cache = load_cache()
+    choice = cache.get(key, {}).get("backend")
+    if choice not in by_name:
+        scores = {b.name: benchmark_backend(b, path) for b in candidates}
+        choice = max(scores, key=scores.get)
+        cache[key] = {"backend": choice, "scores": scores}
+        save_cache(cache)
+        print(f"Benchmarked {key}: " + ", ".join(f"{n} {s:.1f}x" for n, s in scores.items())
+              + f" -> {choice}")
+    return by_name[choice]()
+
+
+def open_backend(path, candidates=None):
+    backend = select_backend(path, candidates)
+    backend.open(path)
+    return backend
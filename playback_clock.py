@@ -0,0 +1,79 @@
+import heapq
+import time
+
+
+class SystemClock:
+    # Real time for playback loops: now() is monotonic seconds, wait() a real
+    # condition wait. spins is True because real sleeps overshoot their deadline
+    spins = True
+
+    def now(self):
+        return time.perf_counter()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def wait(self, condition, timeout=None):
+        # Called with the condition's lock held, like Condition.wait
+        return condition.wait(timeout)
+
+
+class SimulatedClock(SystemClock):
+    # Virtual time that only moves when the playback loop sleeps or waits, so
+    # hours of playback run in as long as the decoding takes. Pause, seek and
+    # stop are scheduled with call_at and run when the loop reaches their time.
+    spins = False
+
+    def __init__(self, start=0.0):
+        self.time = start
+        self.events = []  # heap of (time, order, callback)
+        self.order = 0
+        self.sleeps = []  # (time, seconds) of every sleep and timed wait
+
+    def now(self):
+        return self.time
+
+    def call_at(self, when, callback):
+        heapq.heappush(self.events, (when, self.order, callback))
+        self.order += 1
+
+    def call_later(self, delay, callback):
+        self.call_at(self.time + delay, callback)
+
+    def advance(self, seconds):
+        # Runs every event due in the next `seconds`, in time order
+        target = self.time + max(seconds, 0)
+        while self.events and self.events[0][0] <= target:
+            self.run_next()
+        self.time = target
+
+    def run_next(self):
+        when, _, callback = heapq.heappop(self.events)
+        self.time = max(self.time, when)
+        callback()
+
+    def sleep(self, seconds):
+        self.sleeps.append((self.time, seconds))
+        self.advance(seconds)
+
+    def wait(self, condition, timeout=None):
+        # Time jumps to the next event or the timeout, whichever comes first. The
+        # event runs with the lock released, as a call from another thread would,
+        # and ends the wait early like a notify
+        deadline = None if timeout is None else self.time + timeout
+        if timeout is not None:
+            self.sleeps.append((self.time, timeout))
+        if self.events and (deadline is None or self.events[0][0] <= deadline):
+            condition.release()
+            try:
+                self.run_next()
+            finally:
+                condition.acquire()
+            return True
+        if deadline is None:
+            raise RuntimeError("Simulated playback is waiting with no event scheduled to wake it")
+        self.time = deadline
+        return False
+
+
+system_clock = SystemClock()
@@ -0,0 +1,758 @@
+import math
+import os
+import threading
+import time
+import session_profiler
+import wakeups
+from startup_profile import lazy_import, timed
+from frame_scheduler import FrameScheduler
+from frame_cache import FrameCache
+from quality_governor import QualityGovernor, enabled_from_env
+from playback_clock import system_clock
+from playback_stats import stats
+
+# Stepping back decodes this much before the target in one pass, so the
+# keyframe seek is paid once per chunk rather than once per step
+STEP_CHUNK_SECONDS = 1.0
+# Playback rates offered, and the most frames a second shown at high rates;
+# beyond it whole frames are skipped rather than decoded and dropped late
+MIN_RATE = 0.25
+MAX_RATE = 4.0
+MAX_PRESENT_FPS = 60
+# Trick-play: keyframes only, shown this many times a second at a reduced width
+MIN_SCAN_SPEED = 8
+MAX_SCAN_SPEED = 64
+SCAN_FPS = 8
+SCAN_WIDTH = 480
+# Decode load is decode time over the time a frame is on screen, smoothed;
+# above this a low-resolution proxy is generated and swapped in once ready.
+# Set with MEDIAPLAYER_PROXY_LOAD, or MEDIAPLAYER_AUTO_PROXY=0 to disable
+PROXY_LOAD = float(os.environ.get("MEDIAPLAYER_PROXY_LOAD", 0.9))
+PROXY_CHECK_SECONDS = 1.0
+
+# moviepy, pygame and numpy are imported on first playback, not at start-up
+audio_output = None
+audio_mixer = None
+
+def get_audio_output():
+    # Only pygame's mixer is initialised, never the rest of pygame
+    global audio_output
+    if audio_output is None:
+        audio_output = lazy_import("audio_output").AdaptiveAudioOutput()
+        with timed("pygame.mixer.init"):
+            audio_output.open()
+    return audio_output
+
+
+def get_audio_mixer():
+    # One software mixer on the adaptive output, for video soundtracks and audio files alike
+    global audio_mixer
+    if audio_mixer is None:
+        audio_mixer = lazy_import("audio_mixer").AudioMixer(output=get_audio_output())
+    return audio_mixer
+
+
+class PlaybackEngine:
+    # GUI-free playback: open, play, pause, seek and position, with frames,
+    # positions and the end of the file reported through plain callbacks.
+    # realtime=False presents every frame as fast as it decodes, for
+    # benchmarks, tests and server-side processing; audio=False skips the soundtrack.
+    # Every sleep, wait and timestamp goes through clock, so a SimulatedClock
+    # replays hours of pacing, pause, seek and end of file in moments.
+    # on_state is called when the engine changes scan, reverse or pause by itself.
+    def __init__(self, on_frame=None, on_position=None, on_finished=None,
+                 realtime=True, audio=True, clock=system_clock, auto_proxy=None, adaptive_quality=None,
+                 on_state=None):
+        self.on_frame = on_frame
+        self.on_position = on_position
+        self.on_finished = on_finished
+        self.on_state = on_state
+        self.realtime = realtime
+        self.audio = audio
+        self.clock = clock
+        if auto_proxy is None:
+            auto_proxy = os.environ.get("MEDIAPLAYER_AUTO_PROXY", "1") != "0"
+        self.auto_proxy = auto_proxy
+        # Trades resolution, scaling quality and then frame rate for smoothness
+        # when frames drop or the GUI falls behind, and frame rate straight away
+        # when decoding does; off for non-realtime runs, which never drop
+        if adaptive_quality is None:
+            adaptive_quality = realtime and enabled_from_env()
+        self.governor = QualityGovernor(adaptive_quality)
+        self.backend = None
+        self.audio_clip = None
+        # The soundtrack as a source in the software mixer, in the mix only while heard
+        self.soundtrack = None
+        self.thread = None
+        self.running = False
+        self.paused = False
+        self.current_time = 0
+        # Whether the frame at current_time is already on screen, so playback
+        # carries on from the next one rather than showing it again
+        self.shown = False
+        self.fps = 0
+        self.pixel_format = "rgb"
+        self.scheduler = None
+        # When the frame last handed to on_frame was due, on the engine clock;
+        # None for frames without one (steps, scans, reverse, non-realtime runs)
+        self.deadline = None
+        self.rate = 1.0
+        self.path = None
+        # Media seconds per second while scanning, negative to rewind, 0 when not
+        self.scan_speed = 0
+        self.reverse = False
+        self.loop = None
+        self.keyframes = None
+        self.indexing = None
+        self.frame_cache = FrameCache()
+        # The file that was opened; path is its proxy while one is playing
+        self.original_path = None
+        self.source_backend = None
+        self.decode_load = 0.0
+        # The same for the GUI's conversion and scaling, reported by frame_drawn()
+        self.gui_load = 0.0
+        # Frames advanced per frame shown, which decode time is measured against
+        self.present_step = 1
+        self.proxy_checked = 0
+        self.proxy_opening = None
+        self.seek_started = None
+        # Bumped on pause, resume and seek so the frame clock is re-anchored
+        self.generation = 0
+        self.lock = threading.Lock()
+        # Signalled on resume, seek and stop so a paused loop sleeps without polling
+        self.state_changed = threading.Condition(self.lock)
+
+    @property
+    def duration(self):
+        return self.backend.duration if self.backend else 0
+
+    def position(self):
+        return self.current_time
+
+    def open(self, video_path, backends=None):
+        if self.backend:
+            self.stop()
+        with self.lock:
+            try:
+                # A proxy made for an earlier session is played from the start
+                proxy = lazy_import("proxy_cache").cached(video_path) if self.auto_proxy else None
+                # The fastest backend for this container and codec on this host
+                self.backend = lazy_import("playback_backends").open_backend(proxy or video_path, backends)
+                self.backend.clock = self.clock.now
+                self.audio_clip = self.backend.audio_clip() if self.audio else None
+                if self.audio_clip:
+                    mixer_module = lazy_import("audio_mixer")
+                    samples = mixer_module.load_clip_audio(self.audio_clip)
+                    self.soundtrack = mixer_module.MixerSource(samples, name=os.path.basename(video_path))
+                    get_audio_mixer()
+                self.fps = self.backend.fps
+                self.pixel_format = self.backend.pixel_format
+                self.frame_cache.reset(self.fps, self.pixel_format)
+                self.current_time = 0
+                self.shown = False
+                self.path = proxy or video_path
+                self.original_path = video_path
+                self.decode_load = 0.0
+                self.gui_load = 0.0
+                self.proxy_checked = self.clock.now()
+                self.proxy_opening = None
+                self.governor.reset(self.clock.now())
+                stats.set("proxy", bool(proxy))
+                self.scan_speed = 0
+                self.reverse = False
+                self.keyframes = lazy_import("keyframe_index").cached(self.path)
+                self.indexing = None
+                return True
+            except Exception as e:
+                print(f"Error loading video: {e}")
+                return False
+
+    def play(self):
+        # Starts the loop on the engine's own thread, or resumes it
+        if self.paused:
+            self.resume()
+        elif not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self.run, name="video", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        # The playback loop; blocks until the file ends or halt() is called
+        session_profiler.name_thread("video")
+        with self.lock:
+            if not self.backend:
+                return
+            self.running = True
+            if not self.paused:
+                self.current_time = 0
+                self.shown = False
+            self.backend.seek(self.current_time)
+            self.backend.play()
+            self.scheduler = FrameScheduler(self.fps, self.clock.now, self.clock.sleep, self.clock.spins)
+            generation = -1
+
+        while self.running:
+            if self.scan_speed:
+                self.scan()
+                continue
+            if self.reverse:
+                self.play_reverse()
+                continue
+            with self.lock:
+                wakeups.count("video thread")
+                if self.paused:
+                    self.clock.wait(self.state_changed)
+                    continue
+
+                if not self.backend:
+                    break
+
+                try:
+                    # Re-anchor the clock after start, resume, seek and rate changes
+                    if generation != self.generation:
+                        generation = self.generation
+                        self.scheduler.rate = self.rate
+                        frame_step = self.present_step = self.frame_step()
+                        frame_index = self.scheduler.frame_index(self.current_time)
+                        if self.shown:
+                            frame_index += frame_step
+                        # The next frame is due now, not one interval after the one on screen
+                        self.scheduler.start(frame_index / self.fps)
+                        self.sync_audio(frame_index / self.fps)
+                    elif self.governor.update(self.clock.now(), self.decode_load, self.gui_load):
+                        frame_step = self.present_step = self.frame_step()
+
+                    if self.auto_proxy and self.clock.now() - self.proxy_checked >= PROXY_CHECK_SECONDS:
+                        self.check_proxy()
+
+                    # A-B loop: back to A on the same timeline, so the wrap has no gap
+                    if self.loop and frame_index >= self.loop.end_index:
+                        frame_index = self.wrap_loop(frame_index)
+
+                    # Skip ahead rather than present frames that are already late
+                    if self.realtime:
+                        position = self.scheduler.position()
+                        if (frame_index + 1) / self.fps < position:
+                            stats.incr("frames dropped", int(position * self.fps) - frame_index)
+                            self.governor.frame(0, int(position * self.fps) - frame_index)
+                            frame_index = int(position * self.fps)
+                    pts = frame_index / self.fps
+
+                    frame = None
+                    if pts < self.backend.duration:
+                        frame = self.read_frame(frame_index, pts)
+                    if frame is None:
+                        self.running = False
+                        if self.on_finished:
+                            self.on_finished()
+                        break
+                except Exception as e:
+                    print(f"Error in video playback: {e}")
+                    self.running = False
+                    break
+
+            if self.realtime:
+                # Wait for the frame's deadline outside the lock so pause and seek stay responsive
+                lateness = self.scheduler.wait_until(
+                    pts, lambda seconds: self.sleep_unless_changed(generation, seconds))
+                if lateness is None:
+                    continue
+                stats.record("scheduler wakeup lateness", lateness)
+            self.current_time = pts
+            self.shown = True
+            self.deadline = self.scheduler.deadline(pts) if self.realtime else None
+            if self.on_frame:
+                self.on_frame(self.scaled(frame), pts)
+            if self.on_position:
+                self.on_position(pts)
+            frame_index += frame_step
+            stats.incr("frames presented")
+            self.governor.frame()
+            if self.seek_started is not None:
+                stats.record("seek latency", self.clock.now() - self.seek_started)
+                self.seek_started = None
+            if self.soundtrack and not self.paused:
+                # Positive when the video is ahead of the soundtrack being heard
+                heard = get_audio_mixer().heard_time(self.soundtrack)
+                if heard is not None:
+                    stats.set("av drift seconds", pts - heard)
+
+    def read_frame(self, frame_index, pts):
+        if self.loop:
+            frame = self.loop.frame(frame_index)
+            if frame is not None:
+                stats.incr("loop buffer hits")
+                return frame
+        # Frames go to the GUI through a queued signal, so none may be a decoder
+        # buffer that a later read overwrites: the cache's copy is handed on instead
+        if not self.backend.random_access or not self.frame_cache.budget:
+            return self.owned(self.decode(pts))
+        frame = self.frame_cache.get(frame_index)
+        if frame is None:
+            frame = self.decode(pts)
+            if frame is not None:
+                cached = self.frame_cache.put(frame_index, frame)
+                frame = self.owned(frame) if cached is None else cached
+        return frame
+
+    def owned(self, frame):
+        if frame is not None and self.backend.reuses_buffers:
+            return frame.copy()
+        return frame
+
+    def frame_step(self):
+        # Frames advanced per frame shown: the rate cap, then the governor's decimation
+        step = max(1, math.ceil(self.fps * self.rate / MAX_PRESENT_FPS))
+        return step * self.governor.level["decimate"]
+
+    def scaled(self, frame):
+        # Every nth pixel, as for scan thumbnails, so the GUI converts and scales less
+        step = self.governor.level["scale"]
+        if step == 1:
+            return frame
+        return lazy_import("numpy").ascontiguousarray(frame[::step, ::step])
+
+    def decode(self, pts):
+        # Wall time, not the engine clock: this measures the host, not the schedule.
+        # Load is decode time over the interval each shown frame is on screen;
+        # it includes the backend skipping the frames in between
+        started = time.perf_counter()
+        with stats.timer("decode"):
+            frame = self.backend.read_frame(pts)
+        elapsed = time.perf_counter() - started
+        interval = self.present_step / (self.fps * self.rate)
+        self.decode_load += (elapsed / interval - self.decode_load) * 0.1
+        stats.set("decode load", round(self.decode_load, 3))
+        return frame
+
+    def frame_drawn(self, seconds):
+        # Called from the GUI thread with the time it spent converting and
+        # scaling a frame; smoothed over the interval each frame is on screen
+        if not self.fps:
+            return
+        interval = self.present_step / (self.fps * self.rate)
+        self.gui_load += (seconds / interval - self.gui_load) * 0.1
+        stats.set("gui load", round(self.gui_load, 3))
+
+    def check_proxy(self):
+        # Called with the lock held about once a second during playback
+        self.proxy_checked = self.clock.now()
+        if self.path != self.original_path or not self.backend.random_access or self.loop:
+            return
+        proxy_cache = lazy_import("proxy_cache")
+        manager = proxy_cache.get_manager()
+        if manager.ready(self.original_path):
+            # Opening may probe and benchmark the proxy, so it happens off this thread
+            if self.proxy_opening is None:
+                self.proxy_opening = threading.Thread(
+                    target=self.switch_to_proxy, name="proxy open", daemon=True,
+                    args=(self.original_path, proxy_cache.proxy_path(self.original_path), type(self.backend)))
+                self.proxy_opening.start()
+        elif self.decode_load > PROXY_LOAD or self.governor.level["decimate"] > 1:
+            # Dropping to a lower frame rate already means full rate is out of reach
+            if self.backend.size[1] > proxy_cache.PROXY_HEIGHT:
+                manager.request(self.original_path, self.backend.duration)
+
+    def switch_to_proxy(self, original, proxy, backend_class):
+        # Opens the proxy without the lock, then swaps it in at the current
+        # position; the next frame is from it. A failed open is not retried for this file
+        try:
+            backend = lazy_import("playback_backends").open_backend(proxy, [backend_class])
+            backend.clock = self.clock.now
+            backend.seek(self.current_time)
+            backend.play()
+        except Exception as e:
+            print(f"Error switching to proxy: {e}")
+            return
+        with self.lock:
+            if not self.running or self.original_path != original or self.path != original or self.loop:
+                # Another file, a stop or an A-B loop came first
+                backend.close()
+                return
+            self.swap_in_proxy(proxy, backend)
+
+    def swap_in_proxy(self, proxy, backend):
+        # The soundtrack may still be streaming from the original, so it stays open until close()
+        self.source_backend = self.backend
+        self.backend = backend
+        self.path = proxy
+        self.pixel_format = backend.pixel_format
+        self.frame_cache.reset(self.fps, self.pixel_format)
+        self.keyframes = lazy_import("keyframe_index").cached(proxy)
+        self.indexing = None
+        self.decode_load = 0.0
+        self.generation += 1
+        stats.set("proxy", True)
+        stats.incr("proxy switches")
+
+    def step(self, frames=1):
+        # Pauses and shows the frame `frames` away from the current one; returns
+        # its pts, or None on backends that cannot fetch a given frame
+        if not self.backend or not self.backend.random_access:
+            return None
+        self.pause()
+        started = self.clock.now()
+        with self.lock:
+            if not self.backend:
+                return None
+            last = max(int(self.backend.duration * self.fps) - 1, 0)
+            index = min(max(int(round(self.current_time * self.fps)) + frames, 0), last)
+            pts = index / self.fps
+            try:
+                if frames < 0 and index not in self.frame_cache:
+                    chunk = max(int(STEP_CHUNK_SECONDS * self.fps), 1)
+                    for i in range(max(index - chunk + 1, 0), index):
+                        self.read_frame(i, i / self.fps)
+                frame = self.read_frame(index, pts)
+            except Exception as e:
+                print(f"Error stepping video: {e}")
+                return None
+            if frame is None:
+                return None
+            self.current_time = pts
+            self.shown = True
+            # The loop re-anchors here when playback resumes
+            self.generation += 1
+        stats.record("step latency", self.clock.now() - started)
+        self.deadline = None
+        if self.on_frame:
+            self.on_frame(frame, pts)
+        if self.on_position:
+            self.on_position(pts)
+        return pts
+
+    def sync_audio(self, position):
+        # Called with the lock held whenever the playback loop re-anchors. The
+        # soundtrack moves to the next frame's position at the playback rate,
+        # pitch preserved, and loops with the video; scans and reverse play silent
+        if not self.soundtrack:
+            return
+        mixer = get_audio_mixer()
+        if not self.running or self.paused or self.scan_speed or self.reverse:
+            self.mute_audio()
+            return
+        mixer.set_rate(self.soundtrack, self.rate)
+        # What is rendered now is heard a queued block and a device buffer later
+        mixer.seek(self.soundtrack, position + get_audio_output().latency * self.rate)
+        if self.loop:
+            mixer.set_loop(self.soundtrack, self.loop.start, self.loop.end)
+        else:
+            mixer.set_loop(self.soundtrack, None, None)
+        mixer.add(self.soundtrack)
+        mixer.start()
+
+    def mute_audio(self):
+        # Pause, scan and reverse take the soundtrack out of the mix at once;
+        # the next re-anchor puts it back in step if it should be heard
+        if self.soundtrack:
+            get_audio_mixer().remove(self.soundtrack)
+
+    def set_rate(self, rate):
+        # Video follows at once, with no reopen
+        rate = min(max(rate, MIN_RATE), MAX_RATE)
+        with self.lock:
+            if rate == self.rate:
+                return rate
+            self.rate = rate
+            # The re-anchor retimes the soundtrack too
+            self.generation += 1
+            self.state_changed.notify_all()
+        stats.set("playback rate", rate)
+        return rate
+
+    def set_scan(self, speed):
+        # Keyframe-only fast forward (speed > 0) or rewind (speed < 0) at 8x-64x;
+        # 0 goes back to normal playback from wherever the scan reached
+        if speed:
+            speed = math.copysign(min(max(abs(speed), MIN_SCAN_SPEED), MAX_SCAN_SPEED), speed)
+        with self.lock:
+            # Keyframes are read by timestamp, which needs random access like step and reverse
+            if not self.backend or not self.backend.random_access or speed == self.scan_speed:
+                return self.scan_speed
+            self.scan_speed = speed
+            self.reverse = False
+            self.generation += 1
+            if self.paused and speed:
+                self.paused = False
+                self.backend.play()
+            self.mute_audio()
+            self.state_changed.notify_all()
+            if speed and self.keyframes is None and self.indexing is None:
+                path = self.path
+                self.indexing = lazy_import("keyframe_index").build_async(
+                    path, lambda keyframes: self.keyframes_ready(path, keyframes))
+        stats.set("scan speed", speed)
+        return speed
+
+    def keyframes_ready(self, path, keyframes):
+        with self.lock:
+            if path == self.path:
+                self.keyframes = keyframes
+
+    def scan(self):
+        # Runs on the playback loop's thread until the scan ends. The position
+        # moves at scan_speed and the keyframe nearest it is shown, so only
+        # I-frames are decoded; without an index yet, plain seeks stand in
+        keyframe_index = lazy_import("keyframe_index")
+        generation = -1
+        shown = None
+        ended = False
+        while self.running and self.scan_speed:
+            frame = None
+            with self.lock:
+                wakeups.count("video thread")
+                if self.paused:
+                    self.clock.wait(self.state_changed)
+                    continue
+                if not self.backend:
+                    return
+                if generation != self.generation:
+                    generation = self.generation
+                    started, origin = self.clock.now(), self.current_time
+                target = origin + (self.clock.now() - started) * self.scan_speed
+                if not 0 < target < self.backend.duration:
+                    # Normal playback carries on from the start or the end
+                    self.current_time = min(max(target, 0), self.backend.duration)
+                    self.shown = False
+                    self.backend.seek(self.current_time)
+                    ended = True
+                    break
+                pts = keyframe_index.nearest(self.keyframes, target, self.scan_speed)
+                if pts != shown:
+                    shown = pts
+                    try:
+                        with stats.timer("decode"):
+                            frame = self.backend.read_frame(pts)
+                    except Exception as e:
+                        print(f"Error scanning video: {e}")
+            if frame is not None:
+                frame = self.scan_thumbnail(frame)
+                self.current_time = pts
+                self.shown = True
+                self.deadline = None
+                if self.on_frame:
+                    self.on_frame(frame, pts)
+                if self.on_position:
+                    self.on_position(pts)
+                stats.incr("scan frames")
+            self.sleep_unless_changed(generation, 1 / SCAN_FPS)
+        if ended:
+            # Leaves the scan the same way the controls do
+            self.set_scan(0)
+            self.report_state()
+
+    def report_state(self):
+        if self.on_state:
+            self.on_state()
+
+    def set_loop(self, start, end):
+        # Loops [start, end) until set_loop(None, None); returns whether a loop is set
+        with self.lock:
+            if self.loop:
+                self.loop.close()
+                self.loop = None
+            if start is not None and self.backend and self.backend.random_access and end - start >= 1 / self.fps:
+                width, height = getattr(self.backend, "size", (1920, 1080))
+                self.loop = lazy_import("loop_region").LoopRegion(
+                    type(self.backend), self.path, self.fps, start, end, width * height * 3)
+                stats.set("loop buffered", self.loop.buffered)
+            # Re-anchors the loop, which loops the soundtrack over the same region
+            self.generation += 1
+            self.state_changed.notify_all()
+            return self.loop is not None
+
+    def wrap_loop(self, frame_index):
+        # Called with the lock held once playback reaches B
+        loop = self.loop
+        wrapped = frame_index - loop.length
+        if loop.start_index <= wrapped < loop.end_index:
+            self.scheduler.shift(loop.length / self.fps)
+        else:
+            # Far past B, after a seek: start over at A
+            wrapped = loop.start_index
+            self.scheduler.start(wrapped / self.fps)
+        if not loop.buffered:
+            standby = loop.take_standby(self.backend)
+            if standby:
+                standby.clock = self.clock.now
+                self.backend = standby
+        stats.incr("loop wraps")
+        return wrapped
+
+    def set_reverse(self, enabled):
+        # Real-time reverse playback at the current rate; returns whether it is on
+        with self.lock:
+            if not self.backend or not self.backend.random_access:
+                return False
+            if enabled != self.reverse:
+                self.reverse = enabled
+                self.scan_speed = 0
+                self.generation += 1
+                if self.paused and enabled:
+                    self.paused = False
+                if not enabled:
+                    self.backend.seek(self.current_time)
+                self.mute_audio()
+                self.state_changed.notify_all()
+        stats.set("reverse", enabled)
+        return enabled
+
+    def play_reverse(self):
+        # Runs on the playback loop's thread while reverse is on. Frames come
+        # from a ReverseReader with its own decoder, so the main backend is
+        # left where it was until normal playback takes over again
+        with self.lock:
+            if not self.backend:
+                return
+            backend_class, path, fps, keyframes = type(self.backend), self.path, self.fps, self.keyframes
+        # Opening a decoder can take a while; pause and seek stay responsive meanwhile
+        try:
+            reader = lazy_import("reverse_playback").ReverseReader(backend_class, path, fps, keyframes)
+        except Exception as e:
+            print(f"Error starting reverse playback: {e}")
+            with self.lock:
+                self.reverse = False
+                self.generation += 1
+            self.report_state()
+            return
+        generation = -1
+        reached_start = False
+        try:
+            while self.running and self.reverse:
+                with self.lock:
+                    wakeups.count("video thread")
+                    if self.paused:
+                        self.clock.wait(self.state_changed)
+                        continue
+                    if generation != self.generation:
+                        generation = self.generation
+                        started, origin, rate = self.clock.now(), self.current_time, self.rate
+                        # The frame before the one on screen, or the one holding the position
+                        if self.shown:
+                            index = int(round(origin * self.fps)) - 1
+                        else:
+                            index = math.floor(origin * self.fps + 1e-6)
+                    # Frames whose turn has already passed are skipped, never shown late
+                    position = origin - (self.clock.now() - started) * rate
+                    index = min(index, math.floor(position * self.fps))
+                    # Going backwards, frame index is due once the position falls below its end
+                    due = started + (origin - (index + 1) / self.fps) / rate
+                    if index < 0 and self.clock.now() >= due:
+                        # Reaching the start pauses there, once frame 0 has had its time
+                        self.reverse = False
+                        self.current_time = 0
+                        self.shown = False
+                        self.paused = True
+                        self.generation += 1
+                        self.backend.seek(0)
+                        self.backend.pause()
+                        reached_start = True
+                        break
+                if index >= 0:
+                    # The chunk may still be decoding; wait in short slices so pause and seek stay responsive
+                    frame = reader.frame(index, timeout=0.1)
+                    if frame is None:
+                        continue
+                if self.sleep_unless_changed(generation, max(due - self.clock.now(), 0)) or index < 0:
+                    continue
+                pts = index / self.fps
+                self.current_time = pts
+                self.shown = True
+                self.deadline = None
+                if self.on_frame:
+                    self.on_frame(frame, pts)
+                if self.on_position:
+                    self.on_position(pts)
+                stats.incr("frames presented")
+                index -= 1
+        finally:
+            reader.close()
+        if reached_start:
+            self.report_state()
+
+    def scan_thumbnail(self, frame):
+        # Every nth pixel is enough while scanning and keeps scaling off the GUI thread
+        step = max(frame.shape[1] // SCAN_WIDTH, 1)
+        if step == 1:
+            return frame.copy()
+        return lazy_import("numpy").ascontiguousarray(frame[::step, ::step])
+
+    def sleep_unless_changed(self, generation, seconds):
+        # Returns True if pause, resume, seek or stop cut the sleep short
+        with self.lock:
+            if self.generation == generation and self.running and not self.paused:
+                self.clock.wait(self.state_changed, seconds)
+            return self.generation != generation or not self.running or self.paused
+
+    def pacing_stats(self):
+        return self.scheduler.stats() if self.scheduler else {}
+
+    def halt(self):
+        # Ends the loop and the soundtrack; the caller waits for whichever thread ran it
+        with self.lock:
+            self.running = False
+            self.paused = False
+            self.mute_audio()
+            self.state_changed.notify_all()
+
+    def close(self):
+        with self.lock:
+            if self.loop:
+                self.loop.close()
+                self.loop = None
+            if self.backend:
+                try:
+                    self.backend.close()
+                except Exception as e:
+                    print(f"Error closing video: {e}")
+                self.backend = None
+                self.audio_clip = None
+            if self.soundtrack:
+                self.mute_audio()
+                self.soundtrack.samples.close()
+                self.soundtrack = None
+            if self.source_backend:
+                try:
+                    self.source_backend.close()
+                except Exception as e:
+                    print(f"Error closing video: {e}")
+                self.source_backend = None
+            self.current_time = 0
+            self.shown = False
+
+    def stop(self):
+        self.halt()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+        self.close()
+
+    def pause(self):
+        with self.lock:
+            if self.running and not self.paused:
+                self.paused = True
+                self.generation += 1
+                self.backend.pause()
+                self.mute_audio()
+
+    def resume(self):
+        with self.lock:
+            if self.running and self.paused:
+                self.paused = False
+                self.generation += 1
+                self.backend.play()
+                self.state_changed.notify_all()
+
+    def seek(self, time_pos):
+        with self.lock:
+            if self.backend:
+                # Backends seek in place, so the loop keeps running
+                self.current_time = min(max(time_pos, 0), self.backend.duration)
+                self.shown = False
+                self.seek_started = self.clock.now()
+                self.generation += 1
+                # A cached target needs no decoder seek; read_frame(t) seeks on the next miss
+                index = int(round(self.current_time * self.fps))
+                if not (self.backend.random_access and index in self.frame_cache):
+                    self.backend.seek(self.current_time)
+                self.state_changed.notify_all()
@@ -0,0 +1,116 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+# Written when the player closes; override with MEDIAPLAYER_STATS_PATH
+STATS_PATH = os.environ.get(
+    "MEDIAPLAYER_STATS_PATH",
+    os.path.join(os.path.expanduser("~"), ".mediaplayer", "playback_stats.json"))
+# Power-of-two microsecond buckets: 1 us up to ~8 s
+BUCKETS = 24
+
+
+class Histogram:
+    # Each stage is recorded from a single thread, so a record is a couple of
+    # integer updates with no lock on the hot path
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        micros = int(seconds * 1000000)
+        self.counts[min(micros.bit_length(), BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        # Upper edge of the bucket holding the given fraction of samples
+        wanted = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= wanted:
+                return (1 << index) / 1000000
+        return 0.0
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class PlaybackStats:
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.started = time.monotonic()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def record(self, name, seconds):
+        self.histogram(name).record(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name).record(time.perf_counter() - began)
+
+    def incr(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set(self, name, value):
+        self.gauges[name] = value
+
+    def reset(self):
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.started = time.monotonic()
+
+    def snapshot(self):
+        return {
+            "uptime_s": time.monotonic() - self.started,
+            "stages": {name: h.summary() for name, h in list(self.histograms.items())},
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+        }
+
+    def overlay_lines(self):
+        lines = []
+        for name, histogram in list(self.histograms.items()):
+            summary = histogram.summary()
+            lines.append(f"{name}: {summary['p50_ms']:.1f}/{summary['p99_ms']:.1f} ms p50/p99")
+        for name, value in list(self.counters.items()):
+            lines.append(f"{name}: {value}")
+        for name, value in list(self.gauges.items()):
+            lines.append(f"{name}: {value:.3f}" if isinstance(value, float) else f"{name}: {value}")
+        return lines
+
+    def dump_json(self, path=STATS_PATH):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(self.snapshot(), f, indent=2)
+        except Exception as e:
+            print(f"Error writing playback stats: {e}")
+
+
+# Process-wide registry shared by the video thread, audio mixer and GUI
+stats = PlaybackStats()
@@ -1,10 +1,11 @@
 import sys
 import os
+import wakeups
 from PyQt6.QtWidgets import (QApplication, QWidget, QPushButton, QListWidget, QVBoxLayout,
                              QHBoxLayout, QLabel, QSlider, QFileDialog, QStyle, QSizePolicy)
 from PyQt6.QtCore import Qt, QUrl, QTimer
-from PyQt6.QtGui import QIcon, QPalette, QColor
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
+from PyQt6.QtGui import QIcon, QPalette, QColor, QKeySequence, QShortcut
+from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput, QMediaMetaData
 from PyQt6.QtMultimediaWidgets import QVideoWidget
 
 class ImprovedMediaPlayer(QWidget):
@@ -19,13 +20,14 @@ class ImprovedMediaPlayer(QWidget):
         self.media_player.setAudioOutput(self.audio_output)
         
         self.init_ui()
+        self.init_shortcuts()
         
         self.media_files = []
         self.current_media_index = -1
         
+        # Only runs while something is playing, see media_state_changed
         self.update_timer = QTimer(self)
         self.update_timer.timeout.connect(self.update_position)
-        self.update_timer.start(1000)
         
         self.media_player.playbackStateChanged.connect(self.media_state_changed)
         self.media_player.positionChanged.connect(self.position_changed)
@@ -60,10 +62,18 @@ class ImprovedMediaPlayer(QWidget):
         self.next_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaSkipForward))
         self.stop_button = QPushButton(self)
         self.stop_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaStop))
+        self.frame_back_button = QPushButton(self)
+        self.frame_back_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaSeekBackward))
+        self.frame_back_button.setToolTip("Previous frame (,)")
+        self.frame_forward_button = QPushButton(self)
+        self.frame_forward_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaSeekForward))
+        self.frame_forward_button.setToolTip("Next frame (.)")
         
         control_layout.addWidget(self.previous_button)
+        control_layout.addWidget(self.frame_back_button)
         control_layout.addWidget(self.play_button)
         control_layout.addWidget(self.stop_button)
+        control_layout.addWidget(self.frame_forward_button)
         control_layout.addWidget(self.next_button)
         
         # Slider and duration
@@ -90,6 +100,8 @@ class ImprovedMediaPlayer(QWidget):
         self.stop_button.clicked.connect(self.stop)
         self.previous_button.clicked.connect(self.previous_media)
         self.next_button.clicked.connect(self.next_media)
+        self.frame_back_button.clicked.connect(self.previous_frame)
+        self.frame_forward_button.clicked.connect(self.next_frame)
         self.position_slider.sliderMoved.connect(self.set_position)
         self.playlist.itemDoubleClicked.connect(self.playlist_double_clicked)
 
@@ -132,6 +144,36 @@ class ImprovedMediaPlayer(QWidget):
             self.current_media_index += 1
             self.play_media(self.current_media_index)
 
+    def frame_duration(self):
+        # Milliseconds per frame from the stream's metadata, 25 fps if unknown
+        rate = self.media_player.metaData().value(QMediaMetaData.Key.VideoFrameRate)
+        return 1000 / float(rate) if rate else 40
+
+    def step_frame(self, frames):
+        # QMediaPlayer decodes from the nearest keyframe itself; stepping pauses first
+        if self.media_player.hasVideo():
+            self.media_player.pause()
+            # Aim for the middle of the target frame; adding whole frame lengths
+            # in rounded milliseconds can land inside the current one
+            duration = self.frame_duration()
+            index = max(int(self.media_player.position() // duration) + frames, 0)
+            position = round((index + 0.5) * duration)
+            self.media_player.setPosition(min(position, self.media_player.duration()))
+
+    def next_frame(self):
+        self.step_frame(1)
+
+    def previous_frame(self):
+        self.step_frame(-1)
+
+    def init_shortcuts(self):
+        # Comma and period step one frame back and forward, whichever control
+        # has focus; a keyPressEvent here never saw keys the playlist took
+        for key, action in ((Qt.Key.Key_Comma, self.previous_frame), (Qt.Key.Key_Period, self.next_frame)):
+            shortcut = QShortcut(QKeySequence(key), self)
+            shortcut.setContext(Qt.ShortcutContext.WindowShortcut)
+            shortcut.activated.connect(action)
+
     def playlist_double_clicked(self, item):
         self.current_media_index = self.playlist.row(item)
         self.play_media(self.current_media_index)
@@ -145,8 +187,10 @@ class ImprovedMediaPlayer(QWidget):
     def media_state_changed(self, state):
         if state == QMediaPlayer.PlaybackState.PlayingState:
             self.play_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaPause))
+            self.update_timer.start(1000)
         else:
             self.play_button.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaPlay))
+            self.update_timer.stop()
 
     def position_changed(self, position):
         self.position_slider.setValue(position)
@@ -160,6 +204,7 @@ class ImprovedMediaPlayer(QWidget):
         self.media_player.setPosition(position)
 
     def update_position(self):
+        wakeups.count("position timer")
         self.position_changed(self.media_player.position())
 
     def update_duration_label(self):
@@ -1,135 +1,164 @@
 import sys
 import os
-import pygame
-from PyQt6.QtWidgets import (QApplication, QWidget, QPushButton, QListWidget, QVBoxLayout,
-                             QHBoxLayout, QLabel, QSlider, QFileDialog)
-from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal
-from moviepy.editor import VideoFileClip
-import numpy as np
-from PyQt6.QtGui import QImage, QPixmap
 import time
-import threading
+import startup_profile
+import session_profiler
+import wakeups
+from startup_profile import lazy_import, timed
+from playback_engine import PlaybackEngine, get_audio_mixer
+from playback_clock import system_clock
+from playback_stats import stats
+
+with timed("import PyQt6"):
+    from PyQt6.QtWidgets import (QApplication, QWidget, QPushButton, QListWidget, QVBoxLayout,
+                                 QHBoxLayout, QLabel, QSlider, QFileDialog, QComboBox, QStyle)
+    from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal
+    from PyQt6.QtGui import QImage, QPixmap, QPainter, QColor, QKeySequence, QShortcut
+
+PLAYBACK_RATES = [0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 3.0, 4.0]
+SCAN_SPEEDS = [8, 16, 32, 64]
+
+class VideoLabel(QLabel):
+    # Times its own paint and draws the stats overlay on top of the frame
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.show_stats = False
+        # perf_counter deadline of the frame waiting to be painted, 0 if none
+        self.deadline = 0.0
+
+    def paintEvent(self, event):
+        with stats.timer("paint"):
+            super().paintEvent(event)
+        if self.deadline:
+            # Deadline to the frame actually being painted, early or late: a
+            # frame painted before it is due is as far off as one painted after
+            error = time.perf_counter() - self.deadline
+            stats.record("presentation error", abs(error))
+            if error < 0:
+                stats.incr("frames presented early")
+            self.deadline = 0.0
+        if self.show_stats:
+            painter = QPainter(self)
+            painter.fillRect(4, 4, 330, 16 * len(self.stats_lines) + 8, QColor(0, 0, 0, 160))
+            painter.setPen(QColor("white"))
+            for i, line in enumerate(self.stats_lines):
+                painter.drawText(10, 20 + 16 * i, line)
+            painter.end()
+
+    @property
+    def stats_lines(self):
+        return stats.overlay_lines() or ["No playback stats yet"]
+
+class LoopSlider(QSlider):
+    # The progress slider with the A-B loop markers and region drawn over it
+    def __init__(self, orientation, parent=None):
+        super().__init__(orientation, parent)
+        self.loop_a = None
+        self.loop_b = None
+
+    def set_markers(self, a=None, b=None):
+        self.loop_a = a
+        self.loop_b = b
+        self.update()
+
+    def marker_x(self, value):
+        return QStyle.sliderPositionFromValue(self.minimum(), self.maximum(), value, self.width())
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.loop_a is None:
+            return
+        painter = QPainter(self)
+        a = self.marker_x(self.loop_a)
+        if self.loop_b is not None:
+            painter.fillRect(a, 0, self.marker_x(self.loop_b) - a, self.height(), QColor(255, 165, 0, 90))
+        painter.setPen(QColor(255, 165, 0))
+        for value in (self.loop_a, self.loop_b):
+            if value is not None:
+                painter.drawLine(self.marker_x(value), 0, self.marker_x(value), self.height())
+        painter.end()
 
 class VideoThread(QThread):
-    frame_ready = pyqtSignal(np.ndarray)
+    # Runs a PlaybackEngine on a QThread and turns its callbacks into signals
+    # The frame, the perf_counter time it was emitted, to time signal queueing,
+    # and when it was due, or 0 for frames with no deadline
+    frame_ready = pyqtSignal(object, float, float)
     position_updated = pyqtSignal(float)
     playback_finished = pyqtSignal()
+    # Scan, reverse or pause changed without the controls asking
+    transport_changed = pyqtSignal()
 
-    def __init__(self):
+    def __init__(self, clock=system_clock):
         super().__init__()
-        self.video_clip = None
-        self.audio_thread = None
-        self.running = False
-        self.paused = False
-        self.current_time = 0
-        self.fps = 0
-        self.start_time = 0
-        self.lock = threading.Lock()
-
-    def set_video(self, video_path):
-        with self.lock:
-            if self.video_clip:
-                self.stop()
-            try:
-                self.video_clip = VideoFileClip(video_path)
-                self.fps = self.video_clip.fps
-                self.current_time = 0
-                return True
-            except Exception as e:
-                print(f"Error loading video: {e}")
-                return False
+        self.engine = PlaybackEngine(on_frame=self.emit_frame,
+                                     on_position=self.position_updated.emit,
+                                     on_finished=self.playback_finished.emit,
+                                     on_state=self.transport_changed.emit,
+                                     clock=clock)
+
+    backend = property(lambda self: self.engine.backend)
+    audio_clip = property(lambda self: self.engine.audio_clip)
+    paused = property(lambda self: self.engine.paused)
+    current_time = property(lambda self: self.engine.current_time)
+    pixel_format = property(lambda self: self.engine.pixel_format)
+    scan_speed = property(lambda self: self.engine.scan_speed)
+    reverse = property(lambda self: self.engine.reverse)
+    on_proxy = property(lambda self: self.engine.path != self.engine.original_path)
+    smooth_scaling = property(lambda self: self.engine.governor.level["smooth"])
+
+    @property
+    def running(self):
+        return self.engine.running
+
+    @running.setter
+    def running(self, value):
+        self.engine.running = value
+
+    def frame_drawn(self, seconds):
+        self.engine.frame_drawn(seconds)
+
+    def emit_frame(self, frame, pts):
+        self.frame_ready.emit(frame, time.perf_counter(), self.engine.deadline or 0.0)
+
+    def set_video(self, video_path, backends=None):
+        if self.isRunning():
+            self.stop()
+        return self.engine.open(video_path, backends)
 
     def run(self):
-        with self.lock:
-            if not self.video_clip:
-                return
-            self.running = True
-            self.start_time = time.time() - (self.current_time if self.paused else 0)
-
-        if self.video_clip.audio:
-            self.audio_thread = threading.Thread(target=self.play_audio)
-            self.audio_thread.start()
-        
-        while self.running:
-            with self.lock:
-                if self.paused:
-                    self.msleep(10)
-                    continue
-
-                if not self.video_clip:
-                    break
-
-                try:
-                    elapsed_time = time.time() - self.start_time
-                    self.current_time = elapsed_time
-                    
-                    if self.current_time >= self.video_clip.duration:
-                        self.running = False
-                        self.playback_finished.emit()
-                        break
-                    
-                    frame = self.video_clip.get_frame(self.current_time)
-                    self.frame_ready.emit(frame)
-                    self.position_updated.emit(self.current_time)
-                    
-                    next_frame_time = (self.current_time + 1/self.fps)
-                    sleep_time = max(0, (next_frame_time - elapsed_time))
-                    self.msleep(int(sleep_time * 1000))
-                    
-                except Exception as e:
-                    print(f"Error in video playback: {e}")
-                    self.running = False
-                    break
-
-    def play_audio(self):
-        try:
-            self.video_clip.audio.preview()
-        except Exception as e:
-            print(f"Error playing audio: {e}")
+        self.engine.run()
+
+    def pacing_stats(self):
+        return self.engine.pacing_stats()
 
     def stop(self):
-        with self.lock:
-            self.running = False
-            self.paused = False
-        
-        if self.audio_thread and self.audio_thread.is_alive():
-            pygame.mixer.quit()
-            pygame.mixer.init()
-            self.audio_thread.join(timeout=1)
-        
+        self.engine.halt()
         self.wait()
-        
-        with self.lock:
-            if self.video_clip:
-                try:
-                    self.video_clip.close()
-                except Exception as e:
-                    print(f"Error closing video clip: {e}")
-                self.video_clip = None
-            self.current_time = 0
+        self.engine.close()
 
     def pause(self):
-        with self.lock:
-            if self.running and not self.paused:
-                self.paused = True
-                pygame.mixer.pause()
+        self.engine.pause()
 
     def resume(self):
-        with self.lock:
-            if self.running and self.paused:
-                self.paused = False
-                self.start_time = time.time() - self.current_time
-                pygame.mixer.unpause()
+        self.engine.resume()
 
     def seek(self, time_pos):
-        with self.lock:
-            if self.video_clip:
-                was_paused = self.paused
-                self.stop()
-                self.current_time = min(max(time_pos, 0), self.video_clip.duration)
-                self.paused = was_paused
-                self.running = True
-                self.start()
+        self.engine.seek(time_pos)
+
+    def step(self, frames=1):
+        return self.engine.step(frames)
+
+    def set_rate(self, rate):
+        return self.engine.set_rate(rate)
+
+    def set_scan(self, speed):
+        return self.engine.set_scan(speed)
+
+    def set_reverse(self, enabled):
+        return self.engine.set_reverse(enabled)
+
+    def set_loop(self, start, end):
+        return self.engine.set_loop(start, end)
 
 class MediaPlayer(QWidget):
     def __init__(self):
@@ -137,17 +166,26 @@ class MediaPlayer(QWidget):
         self.setWindowTitle("Media Player")
         self.setGeometry(200, 200, 900, 600)
         self.init_ui()
+        self.init_shortcuts()
 
-        pygame.mixer.init()
-        pygame.init()
+        self.audio_mixer = None
+        self.audio_source = None
+        self.crossfade_seconds = 2.0
+        self.audio_timer = QTimer(self)
+        self.audio_timer.timeout.connect(self.check_audio_progress)
+        self.proxy_timer = QTimer(self)
+        self.proxy_timer.timeout.connect(self.update_proxy_status)
 
         self.video_thread = VideoThread()
         self.video_thread.frame_ready.connect(self.update_video_frame)
         self.video_thread.position_updated.connect(self.update_slider_position)
         self.video_thread.playback_finished.connect(self.on_playback_finished)
+        self.video_thread.transport_changed.connect(self.sync_transport)
 
         self.playing = False
         self.is_video = False
+        self.playback_rate = 1.0
+        self.profiler = None
         self.media_files = []
         self.current_media_index = -1
 
@@ -188,14 +226,26 @@ class MediaPlayer(QWidget):
         self.add_media_button = QPushButton('Add Media', self)
         self.remove_media_button = QPushButton('Remove Media', self)
         self.current_media_label = QLabel("No media playing", self)
-        self.video_label = QLabel(self)
+        self.proxy_label = QLabel("", self)
+        self.video_label = VideoLabel(self)
         self.video_label.setMinimumSize(400, 300)
         self.play_button = QPushButton('Play', self)
         self.pause_button = QPushButton('Pause', self)
         self.stop_button = QPushButton('Stop', self)
         self.previous_button = QPushButton('Previous', self)
         self.next_button = QPushButton('Next', self)
-        self.progress_slider = QSlider(Qt.Orientation.Horizontal, self)
+        self.rewind_button = QPushButton('<<', self)
+        self.fast_forward_button = QPushButton('>>', self)
+        self.reverse_button = QPushButton('Reverse', self)
+        self.reverse_button.setCheckable(True)
+        self.frame_back_button = QPushButton('< Frame', self)
+        self.frame_forward_button = QPushButton('Frame >', self)
+        self.speed_box = QComboBox(self)
+        for rate in PLAYBACK_RATES:
+            self.speed_box.addItem(f"{rate:g}x", rate)
+        self.speed_box.setCurrentIndex(PLAYBACK_RATES.index(1.0))
+        self.progress_slider = LoopSlider(Qt.Orientation.Horizontal, self)
+        self.loop_button = QPushButton('A-B', self)
 
         # Connect signals
         self.add_media_button.clicked.connect(self.add_media)
@@ -205,7 +255,15 @@ class MediaPlayer(QWidget):
         self.stop_button.clicked.connect(self.stop_media)
         self.previous_button.clicked.connect(self.previous_media)
         self.next_button.clicked.connect(self.next_media)
+        self.rewind_button.clicked.connect(lambda: self.scan(-1))
+        self.fast_forward_button.clicked.connect(lambda: self.scan(1))
+        self.reverse_button.toggled.connect(self.set_reverse)
+        self.frame_back_button.clicked.connect(self.previous_frame)
+        self.frame_forward_button.clicked.connect(self.next_frame)
+        self.speed_box.currentIndexChanged.connect(
+            lambda index: self.set_rate(self.speed_box.itemData(index)))
         self.progress_slider.sliderMoved.connect(self.set_position)
+        self.loop_button.clicked.connect(self.toggle_loop)
 
         # Set up layouts
         main_layout = QHBoxLayout()
@@ -219,12 +277,20 @@ class MediaPlayer(QWidget):
         left_layout.addWidget(self.remove_media_button)
 
         controls_layout.addWidget(self.previous_button)
+        controls_layout.addWidget(self.rewind_button)
+        controls_layout.addWidget(self.reverse_button)
+        controls_layout.addWidget(self.frame_back_button)
         controls_layout.addWidget(self.play_button)
         controls_layout.addWidget(self.pause_button)
         controls_layout.addWidget(self.stop_button)
+        controls_layout.addWidget(self.frame_forward_button)
+        controls_layout.addWidget(self.fast_forward_button)
         controls_layout.addWidget(self.next_button)
+        controls_layout.addWidget(self.loop_button)
+        controls_layout.addWidget(self.speed_box)
 
         right_layout.addWidget(self.current_media_label)
+        right_layout.addWidget(self.proxy_label)
         right_layout.addWidget(self.video_label)
         right_layout.addWidget(self.progress_slider)
         right_layout.addLayout(controls_layout)
@@ -267,49 +333,86 @@ class MediaPlayer(QWidget):
         except Exception as e:
             print(f"Error playing media: {e}")
 
-    def load_media(self, media_path):
+    def load_media(self, media_path, crossfade=False):
         try:
-            self.stop_media()
-
             if not os.path.exists(media_path):
                 raise FileNotFoundError(f"File not found: {media_path}")
 
-            if media_path.lower().endswith(('.mp4', '.avi')):
+            # Audio to audio transitions can overlap in the software mixer
+            is_video = media_path.lower().endswith(('.mp4', '.avi'))
+            crossfade = crossfade and self.playing and not self.is_video and not is_video
+            if not crossfade:
+                self.stop_media()
+            self.clear_loop()
+
+            if is_video:
                 self.is_video = True
                 if self.video_thread.set_video(media_path):
-                    duration = self.video_thread.video_clip.duration
+                    duration = self.video_thread.backend.duration
                     self.progress_slider.setMaximum(int(duration * 1000))
+                    self.video_thread.set_rate(self.playback_rate)
                     self.video_thread.running = True
                     self.video_thread.start()
                     self.playing = True
+                    self.proxy_timer.start(1000)
+                    self.update_proxy_status()
                 else:
                     raise Exception("Failed to load video")
             else:
                 self.is_video = False
-                pygame.mixer.music.load(media_path)
-                pygame.mixer.music.play()
-                sound = pygame.mixer.Sound(media_path)
-                self.progress_slider.setMaximum(int(sound.get_length() * 1000))
+                mixer = self.get_audio_mixer()
+                samples = lazy_import("audio_mixer").load_sound(media_path)
+                name = os.path.basename(media_path)
+                if crossfade:
+                    self.audio_source = mixer.crossfade_to(
+                        samples, self.crossfade_seconds, name=name)
+                else:
+                    self.audio_source = mixer.add_source(samples, name=name)
+                mixer.set_rate(self.audio_source, self.playback_rate)
+                mixer.start()
+                self.progress_slider.setMaximum(int(self.audio_source.duration * 1000))
+                self.audio_timer.start(200)
                 self.playing = True
 
             self.current_media_label.setText(f"Playing: {os.path.basename(media_path)}")
+            stats.set("current file", media_path)
+            # One profile per file when --profile or MEDIAPLAYER_PROFILE=1 is set
+            self.stop_profiler()
+            self.profiler = session_profiler.start_session(media_path)
         except Exception as e:
             print(f"Error loading media: {e}")
             self.current_media_label.setText("Error loading media")
             self.playing = False
 
-    def update_video_frame(self, frame):
+    def update_video_frame(self, frame, emitted_at, deadline):
         try:
+            started = time.perf_counter()
+            stats.record("signal queue", started - emitted_at)
             height, width, channel = frame.shape
-            bytes_per_line = 3 * width
-            q_img = QImage(frame.data, width, height, bytes_per_line, QImage.Format.Format_RGB888)
-            pixmap = QPixmap.fromImage(q_img)
-            scaled_pixmap = pixmap.scaled(
-                self.video_label.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
+            bytes_per_line = frame.strides[0]
+            if self.video_thread.pixel_format == "bgr":
+                image_format = QImage.Format.Format_BGR888
+            else:
+                image_format = QImage.Format.Format_RGB888
+            with stats.timer("qimage"):
+                q_img = QImage(frame.data, width, height, bytes_per_line, image_format)
+            with stats.timer("qpixmap"):
+                pixmap = QPixmap.fromImage(q_img)
+            # The quality governor drops to nearest-neighbour scaling under load
+            if self.video_thread.smooth_scaling:
+                transformation = Qt.TransformationMode.SmoothTransformation
+            else:
+                transformation = Qt.TransformationMode.FastTransformation
+            with stats.timer("scale"):
+                scaled_pixmap = pixmap.scaled(
+                    self.video_label.size(),
+                    Qt.AspectRatioMode.KeepAspectRatio,
+                    transformation
+                )
+            self.video_label.deadline = deadline
             self.video_label.setPixmap(scaled_pixmap)
+            # The governor's GUI load, separate from decoding
+            self.video_thread.frame_drawn(time.perf_counter() - started)
         except Exception as e:
             print(f"Error updating video frame: {e}")
 
@@ -323,8 +426,8 @@ class MediaPlayer(QWidget):
         try:
             if self.is_video:
                 self.video_thread.seek(position / 1000)
-            else:
-                pygame.mixer.music.set_pos(position / 1000)
+            elif self.audio_source:
+                self.audio_mixer.seek(self.audio_source, position / 1000)
         except Exception as e:
             print(f"Error setting position: {e}")
 
@@ -339,15 +442,134 @@ class MediaPlayer(QWidget):
                         self.video_thread.pause()
                         self.pause_button.setText("Resume")
                 else:
-                    if pygame.mixer.music.get_busy():
-                        pygame.mixer.music.pause()
+                    if not self.audio_mixer.paused:
+                        self.audio_mixer.pause()
+                        self.audio_timer.stop()
                         self.pause_button.setText("Resume")
                     else:
-                        pygame.mixer.music.unpause()
+                        self.audio_mixer.resume()
+                        self.audio_timer.start(200)
                         self.pause_button.setText("Pause")
         except Exception as e:
             print(f"Error toggling pause: {e}")
 
+    def step_frame(self, frames):
+        # Frame-by-frame review: pauses playback and shows the neighbouring frame
+        try:
+            if self.playing and self.is_video:
+                if self.video_thread.step(frames) is not None:
+                    self.pause_button.setText("Resume")
+        except Exception as e:
+            print(f"Error stepping frame: {e}")
+
+    def next_frame(self):
+        self.step_frame(1)
+
+    def previous_frame(self):
+        self.step_frame(-1)
+
+    def set_rate(self, rate):
+        # Applies to the playing file at once and carries over to the next one
+        try:
+            self.playback_rate = rate
+            if self.is_video:
+                self.video_thread.set_rate(rate)
+            elif self.audio_source:
+                self.audio_mixer.set_rate(self.audio_source, rate)
+        except Exception as e:
+            print(f"Error setting playback rate: {e}")
+
+    def change_rate(self, steps):
+        index = min(max(self.speed_box.currentIndex() + steps, 0), len(PLAYBACK_RATES) - 1)
+        self.speed_box.setCurrentIndex(index)
+
+    def scan(self, direction):
+        # Each press in the same direction doubles the speed, 8x to 64x then back
+        # to normal playback; the other direction starts again at 8x
+        current = self.video_thread.scan_speed
+        speeds = [direction * s for s in SCAN_SPEEDS]
+        if current in speeds[:-1]:
+            self.set_scan(speeds[speeds.index(current) + 1])
+        elif current == speeds[-1]:
+            self.set_scan(0)
+        else:
+            self.set_scan(speeds[0])
+
+    def set_reverse(self, enabled):
+        try:
+            on = self.playing and self.is_video and self.video_thread.set_reverse(enabled)
+            if on != enabled:
+                self.reverse_button.setChecked(on)
+            self.pause_button.setText("Pause")
+        except Exception as e:
+            print(f"Error toggling reverse playback: {e}")
+
+    def toggle_loop(self):
+        # First press marks A, the second marks B and starts looping, the third clears
+        try:
+            if not self.playing:
+                return
+            position = self.progress_slider.value()
+            slider = self.progress_slider
+            if slider.loop_a is None:
+                slider.set_markers(position)
+                self.loop_button.setText("A-B: set B")
+            elif slider.loop_b is None:
+                a, b = sorted((slider.loop_a, position))
+                if self.is_video:
+                    looping = self.video_thread.set_loop(a / 1000, b / 1000)
+                else:
+                    self.audio_mixer.set_loop(self.audio_source, a / 1000, b / 1000)
+                    looping = True
+                if looping:
+                    slider.set_markers(a, b)
+                    self.loop_button.setText("A-B: clear")
+                else:
+                    self.clear_loop()
+            else:
+                self.clear_loop()
+        except Exception as e:
+            print(f"Error setting loop: {e}")
+
+    def clear_loop(self):
+        if self.progress_slider.loop_b is not None:
+            if self.is_video:
+                self.video_thread.set_loop(None, None)
+            elif self.audio_source:
+                self.audio_mixer.set_loop(self.audio_source, None, None)
+        self.progress_slider.set_markers()
+        self.loop_button.setText("A-B")
+
+    def set_scan(self, speed):
+        try:
+            if not (self.playing and self.is_video):
+                return
+            self.show_scan(self.video_thread.set_scan(speed))
+            self.pause_button.setText("Pause")
+        except Exception as e:
+            print(f"Error scanning: {e}")
+
+    def show_scan(self, speed):
+        if speed:
+            direction = "forward" if speed > 0 else "back"
+            self.current_media_label.setText(f"Scanning {abs(speed):g}x {direction}")
+        else:
+            name = os.path.basename(self.media_files[self.current_media_index])
+            self.current_media_label.setText(f"Playing: {name}")
+
+    def sync_transport(self):
+        # The engine ended a scan at either end of the file, or reverse playback at the start
+        try:
+            if not (self.playing and self.is_video):
+                return
+            self.show_scan(self.video_thread.scan_speed)
+            self.reverse_button.blockSignals(True)
+            self.reverse_button.setChecked(self.video_thread.reverse)
+            self.reverse_button.blockSignals(False)
+            self.pause_button.setText("Resume" if self.video_thread.paused else "Pause")
+        except Exception as e:
+            print(f"Error updating controls: {e}")
+
     def stop_media(self):
         try:
             if self.playing:
@@ -356,13 +578,22 @@ class MediaPlayer(QWidget):
                     self.video_thread.stop()
                     self.video_label.clear()
                 else:
-                    pygame.mixer.music.stop()
+                    self.audio_timer.stop()
+                    self.audio_mixer.stop()
+                    self.audio_source = None
                 self.current_media_label.setText("No media playing")
+                stats.set("current file", "")
+                self.stop_profiler()
                 self.progress_slider.setValue(0)
                 self.pause_button.setText("Pause")
         except Exception as e:
             print(f"Error stopping media: {e}")
 
+    def stop_profiler(self):
+        if self.profiler:
+            self.profiler.stop()
+            self.profiler = None
+
     def previous_media(self):
         try:
             if self.current_media_index > 0:
@@ -372,27 +603,104 @@ class MediaPlayer(QWidget):
         except Exception as e:
             print(f"Error playing previous media: {e}")
 
-    def next_media(self):
+    def next_media(self, crossfade=False):
         try:
             if self.current_media_index < len(self.media_files) - 1:
                 self.current_media_index += 1
                 self.playlist.setCurrentRow(self.current_media_index)
-                self.load_media(self.media_files[self.current_media_index])
+                self.load_media(self.media_files[self.current_media_index], crossfade)
         except Exception as e:
             print(f"Error playing next media: {e}")
 
+    def update_proxy_status(self):
+        # Proxy generation progress and the size of the proxy cache, once a second
+        wakeups.count("proxy status timer")
+        try:
+            proxy_cache = lazy_import("proxy_cache")
+            manager = proxy_cache.get_manager()
+            pending = manager.pending()
+            size = f"cache {manager.cache_size() / 1024 ** 2:.0f} MB"
+            if pending:
+                done = ", ".join(f"{os.path.basename(p)} {f:.0%}" for p, f in pending.items())
+                self.proxy_label.setText(f"Generating proxy: {done} ({size})")
+            elif self.playing and self.is_video and self.video_thread.on_proxy:
+                self.proxy_label.setText(f"Playing low-resolution proxy ({size})")
+            else:
+                self.proxy_label.setText("")
+                if not (self.playing and self.is_video):
+                    self.proxy_timer.stop()
+        except Exception as e:
+            print(f"Error updating proxy status: {e}")
+
     def on_playback_finished(self):
         self.next_media()
 
+    def get_audio_mixer(self):
+        # Shared with the video engine, which plays soundtracks through it
+        if self.audio_mixer is None:
+            self.audio_mixer = get_audio_mixer()
+        return self.audio_mixer
+
+    def check_audio_progress(self):
+        wakeups.count("audio progress timer")
+        try:
+            source = self.audio_source
+            if not source:
+                return
+            self.progress_slider.setValue(int(source.time * 1000))
+            has_next = self.current_media_index < len(self.media_files) - 1
+            if has_next and not source.loop and source.duration - source.time <= self.crossfade_seconds:
+                self.next_media(crossfade=True)
+            elif source.finished:
+                self.stop_media()
+        except Exception as e:
+            print(f"Error checking audio progress: {e}")
+
+    def init_shortcuts(self):
+        # Window shortcuts work whichever control has focus; a keyPressEvent
+        # here never saw the keys the playlist, slider and buttons took
+        keys = [
+            # S toggles the playback stats overlay on the video
+            (Qt.Key.Key_S, self.toggle_stats),
+            # Comma and period step one frame back and forward
+            (Qt.Key.Key_Comma, self.previous_frame),
+            (Qt.Key.Key_Period, self.next_frame),
+            # J and L scan back and forward, K returns to normal playback
+            (Qt.Key.Key_J, lambda: self.scan(-1)),
+            (Qt.Key.Key_L, lambda: self.scan(1)),
+            (Qt.Key.Key_K, lambda: self.set_scan(0)),
+            # Brackets step through the playback rates
+            (Qt.Key.Key_BracketLeft, lambda: self.change_rate(-1)),
+            (Qt.Key.Key_BracketRight, lambda: self.change_rate(1)),
+        ]
+        for key, action in keys:
+            shortcut = QShortcut(QKeySequence(key), self)
+            shortcut.setContext(Qt.ShortcutContext.WindowShortcut)
+            shortcut.activated.connect(action)
+
+    def toggle_stats(self):
+        self.video_label.show_stats = not self.video_label.show_stats
+        self.video_label.update()
+
     def closeEvent(self, event):
         try:
             self.stop_media()
+            stats.set("pacing", self.video_thread.pacing_stats())
+            stats.dump_json()
+            # Queued proxies are dropped; one already transcoding is finished and kept
+            if "proxy_cache" in sys.modules and sys.modules["proxy_cache"].manager:
+                sys.modules["proxy_cache"].manager.shutdown()
             event.accept()
         except Exception as e:
             print(f"Error during close: {e}")
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    player = MediaPlayer()
-    player.show()
+    with timed("QApplication"):
+        app = QApplication(sys.argv)
+    with timed("MediaPlayer window"):
+        player = MediaPlayer()
+        player.show()
+    lazy_import("metrics_server").start_from_env()
+    # Report once the event loop has painted the window
+    QTimer.singleShot(0, startup_profile.report)
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,146 @@
+import multiprocessing
+import os
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from startup_profile import lazy_import
+from playback_stats import stats
+from keyframe_index import media_key
+
+# Proxies live beside the keyframe index, one per source file version
+PROXY_DIR = os.path.join(os.path.expanduser("~"), ".mediaplayer", "proxies")
+# 540p H.264 with a keyframe every 15 frames and no B-frames: cheap to decode,
+# seek, step and reverse on a kiosk CPU
+PROXY_HEIGHT = 540
+PROXY_GOP = 15
+WORKERS = 1
+# Transcoding runs at low priority on at most half the cores, so playback,
+# which is already behind when a proxy is asked for, keeps the rest
+THREADS = max((os.cpu_count() or 2) // 2, 1)
+NICENESS = 10
+
+progress_queue = None  # set in each pool worker
+
+
+def proxy_path(path):
+    return os.path.join(PROXY_DIR, media_key(path) + ".mp4")
+
+
+def cached(path):
+    proxy = proxy_path(path)
+    return proxy if os.path.exists(proxy) else None
+
+
+def init_worker(queue):
+    global progress_queue
+    progress_queue = queue
+    # ffmpeg inherits the worker's priority; Windows gets a priority class in transcode
+    if hasattr(os, "nice"):
+        os.nice(NICENESS)
+
+
+def transcode(path, out_path, duration):
+    # Runs in a pool worker; ffmpeg's -progress output is forwarded as fractions
+    ffmpeg = lazy_import("imageio_ffmpeg").get_ffmpeg_exe()
+    partial = out_path + ".partial.mp4"
+    command = [ffmpeg, "-y", "-hide_banner", "-loglevel", "error", "-nostats", "-i", path,
+               "-map", "0:v:0", "-map", "0:a:0?",
+               "-vf", f"scale=-2:'min({PROXY_HEIGHT},ih)'",
+               "-threads", str(THREADS), "-filter_threads", "1",
+               "-c:v", "libx264", "-preset", "veryfast", "-crf", "23",
+               "-g", str(PROXY_GOP), "-bf", "0", "-pix_fmt", "yuv420p",
+               "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart",
+               "-progress", "pipe:1", partial]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+                               creationflags=getattr(subprocess, "BELOW_NORMAL_PRIORITY_CLASS", 0))
+    for line in process.stdout:
+        key, _, value = line.strip().partition("=")
+        if key == "out_time_us" and value.isdigit() and duration:
+            progress_queue.put((path, min(int(value) / 1e6 / duration, 1.0)))
+    if process.wait() != 0:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise RuntimeError(f"ffmpeg exited with {process.returncode}")
+    os.replace(partial, out_path)
+    progress_queue.put((path, 1.0))
+    return out_path
+
+
+class ProxyManager:
+    # Generates proxies in a process pool so transcoding never competes with
+    # playback for the GIL; progress arrives over a queue
+    def __init__(self, workers=WORKERS):
+        self.workers = workers
+        self.pool = None
+        self.queue = None
+        self.jobs = {}  # source path -> future
+        self.progress = {}  # source path -> fraction done
+        self.failed = set()  # not retried until the player restarts
+        self.lock = threading.Lock()
+
+    def start_pool(self):
+        context = multiprocessing.get_context("spawn")
+        self.queue = context.Queue()
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=context,
+                                        initializer=init_worker, initargs=(self.queue,))
+        threading.Thread(target=self.drain, name="proxy progress", daemon=True).start()
+
+    def drain(self):
+        while True:
+            path, fraction = self.queue.get()
+            with self.lock:
+                self.progress[path] = fraction
+            stats.set("proxy progress", fraction)
+
+    def request(self, path, duration):
+        # Queues a proxy for path unless one exists or is already being made
+        with self.lock:
+            if path in self.jobs or path in self.failed or cached(path):
+                return
+            if self.pool is None:
+                self.start_pool()
+            os.makedirs(PROXY_DIR, exist_ok=True)
+            self.progress[path] = 0.0
+            future = self.pool.submit(transcode, path, proxy_path(path), duration)
+            future.add_done_callback(lambda f: self.finished(path, f))
+            self.jobs[path] = future
+        stats.incr("proxies requested")
+
+    def finished(self, path, future):
+        with self.lock:
+            if future.exception():
+                print(f"Error generating proxy for {path}: {future.exception()}")
+                self.jobs.pop(path, None)
+                self.failed.add(path)
+                self.progress.pop(path, None)
+            else:
+                self.progress[path] = 1.0
+        stats.set("proxy cache bytes", self.cache_size())
+
+    def ready(self, path):
+        future = self.jobs.get(path)
+        return (future is None or future.done()) and cached(path)
+
+    def pending(self):
+        with self.lock:
+            return {path: self.progress.get(path, 0.0) for path, f in self.jobs.items() if not f.done()}
+
+    def cache_size(self):
+        try:
+            return sum(entry.stat().st_size for entry in os.scandir(PROXY_DIR) if entry.is_file())
+        except FileNotFoundError:
+            return 0
+
+    def shutdown(self):
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+manager = None
+
+
+def get_manager():
+    global manager
+    if manager is None:
+        manager = ProxyManager()
+    return manager
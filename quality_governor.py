@@ -0,0 +1,106 @@
+import os
+from playback_stats import stats
+
+# Cheapest last. scale shows every nth pixel, smooth picks the GUI's scaling
+# filter and decimate presents every nth frame. Only decimate cuts decoding,
+# as the backend skips the frames in between; scale and smooth only cut the
+# GUI's conversion and scaling
+LEVELS = [
+    {"name": "full", "scale": 1, "smooth": True, "decimate": 1},
+    {"name": "half resolution", "scale": 2, "smooth": True, "decimate": 1},
+    {"name": "fast scaling", "scale": 2, "smooth": False, "decimate": 1},
+    {"name": "half frame rate", "scale": 2, "smooth": False, "decimate": 2},
+    {"name": "third frame rate", "scale": 4, "smooth": False, "decimate": 3},
+]
+# Judged once a window. Decode load over DOWN_LOAD steps straight down to the
+# next level that decodes fewer frames; drops, or GUI load over DOWN_LOAD,
+# step down one level. Stepping up needs HOLD_SECONDS of windows with no drops
+# and both loads under UP_LOAD. A step up
+# undone within the hold doubles the hold, up to MAX_HOLD_SECONDS, so a load
+# that sits between the thresholds cannot make the level flap
+WINDOW_SECONDS = 1.0
+HOLD_SECONDS = 3.0
+MAX_HOLD_SECONDS = 60.0
+DOWN_LOAD = 0.9
+UP_LOAD = 0.6
+DOWN_DROP_RATE = 0.02
+
+
+def enabled_from_env():
+    return os.environ.get("MEDIAPLAYER_ADAPTIVE_QUALITY", "1") != "0"
+
+
+class QualityGovernor:
+    # Fed by the playback loop: frame() for each frame presented or dropped,
+    # update() with the decode and GUI loads at the frame rate being shown
+    # (see PlaybackEngine.decode and PlaybackEngine.frame_drawn)
+    def __init__(self, enabled=True, levels=LEVELS):
+        self.enabled = enabled
+        self.levels = levels
+        self.reset(0)
+
+    @property
+    def level(self):
+        return self.levels[self.index]
+
+    def reset(self, now):
+        self.index = 0
+        self.window_started = now
+        self.presented = 0
+        self.dropped = 0
+        self.calm_since = None
+        self.hold = HOLD_SECONDS
+        self.stepped_up = None
+        stats.set("quality level", self.level["name"])
+
+    def frame(self, presented=1, dropped=0):
+        self.presented += presented
+        self.dropped += dropped
+
+    def update(self, now, decode_load, gui_load=0.0):
+        # Returns True when the level changed
+        if not self.enabled or now - self.window_started < WINDOW_SECONDS:
+            return False
+        frames = self.presented + self.dropped
+        drop_rate = self.dropped / frames if frames else 0.0
+        self.window_started = now
+        self.presented = self.dropped = 0
+        if not frames:
+            # Paused or seeking: nothing to judge
+            self.calm_since = None
+            return False
+        target = None
+        if decode_load > DOWN_LOAD:
+            # Smaller or rougher pictures decode no faster
+            target = self.fewer_decodes()
+        if target is None and (drop_rate > DOWN_DROP_RATE or gui_load > DOWN_LOAD) \
+                and self.index < len(self.levels) - 1:
+            target = self.index + 1
+        if target is not None:
+            if self.stepped_up is not None and now - self.stepped_up < self.hold:
+                self.hold = min(self.hold * 2, MAX_HOLD_SECONDS)
+            self.stepped_up = None
+            return self.step(target - self.index)
+        if self.index and not drop_rate and decode_load < UP_LOAD and gui_load < UP_LOAD:
+            if self.calm_since is None:
+                self.calm_since = now
+            if now - self.calm_since >= self.hold:
+                self.stepped_up = now
+                return self.step(-1)
+        else:
+            self.calm_since = None
+        return False
+
+    def fewer_decodes(self):
+        # The first cheaper level that decimates more, or None at the last one
+        for index in range(self.index + 1, len(self.levels)):
+            if self.levels[index]["decimate"] > self.level["decimate"]:
+                return index
+        return None
+
+    def step(self, direction):
+        self.index += direction
+        self.calm_since = None
+        stats.set("quality level", self.level["name"])
+        stats.incr("quality steps down" if direction > 0 else "quality steps up")
+        return True
@@ -0,0 +1,124 @@
+import bisect
+import threading
+import time
+from collections import OrderedDict
+from playback_stats import stats
+
+# Chunks follow the keyframe index so each is decoded from its own keyframe
+# exactly once; long GOPs are split so one chunk never exceeds this
+MAX_CHUNK_SECONDS = 2.0
+
+
+class ReverseReader:
+    # Serves frames backwards from its own decoder. A worker decodes whole
+    # chunks forwards and keeps two: the one being shown and the one before
+    # it, prefetched in the background. Memory is bounded by three chunks of
+    # raw frames, those two and the one being decoded.
+    def __init__(self, backend_class, path, fps, keyframes=None):
+        self.decoder = backend_class()
+        self.decoder.open(path)
+        self.fps = fps
+        self.duration = self.decoder.duration
+        self.last_index = max(int(self.duration * fps) - 1, 0)
+        self.chunk_frames = max(int(MAX_CHUNK_SECONDS * fps), 1)
+        self.starts = sorted({int(round(k * fps)) for k in keyframes}) if keyframes else None
+        self.chunks = OrderedDict()  # start index -> list of frames
+        self.wanted = None
+        self.resident = 0
+        self.running = True
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.worker, name="reverse decode", daemon=True)
+        self.thread.start()
+
+    def chunk_start(self, index):
+        start = index // self.chunk_frames * self.chunk_frames
+        if self.starts:
+            # The last keyframe at or before index, then whole chunk lengths from it
+            i = bisect.bisect_right(self.starts, index)
+            keyframe = self.starts[i - 1] if i else 0
+            start = keyframe + (index - keyframe) // self.chunk_frames * self.chunk_frames
+        return start
+
+    def chunk_end(self, start):
+        end = start + self.chunk_frames
+        if self.starts:
+            i = bisect.bisect_right(self.starts, start)
+            if i < len(self.starts):
+                end = min(end, self.starts[i])
+        return min(end, self.last_index + 1)
+
+    def frame(self, index, timeout=None):
+        # The frame at index, waiting up to timeout for its chunk; None on timeout
+        start = self.chunk_start(index)
+        with self.condition:
+            if self.wanted != start:
+                self.wanted = start
+                self.condition.notify_all()
+            if start not in self.chunks:
+                stats.incr("reverse stalls")
+                self.condition.wait_for(lambda: start in self.chunks or not self.running, timeout)
+            frames = self.chunks.get(start)
+        if not frames:
+            return None
+        return frames[min(index - start, len(frames) - 1)]
+
+    def needed(self):
+        # The chunk being shown and the one before it, in decode order
+        if self.wanted is None:
+            return []
+        if self.wanted == 0:
+            return [0]
+        return [self.wanted, self.chunk_start(self.wanted - 1)]
+
+    def next_job(self):
+        for start in self.needed():
+            if start not in self.chunks:
+                return start
+        return None
+
+    def worker(self):
+        while True:
+            with self.condition:
+                job = None
+                while self.running and job is None:
+                    job = self.next_job()
+                    if job is None:
+                        self.condition.wait()
+                if not self.running:
+                    return
+                # Anything else has been played already or was left behind by a seek
+                needed = self.needed()
+                for start in [s for s in self.chunks if s not in needed]:
+                    self.drop(start)
+            frames = self.decode(job)
+            with self.condition:
+                if self.running:
+                    self.chunks[job] = frames
+                    self.resident += sum(f.nbytes for f in frames)
+                    stats.set("reverse buffer bytes", self.resident)
+                self.condition.notify_all()
+
+    def drop(self, start):
+        self.resident -= sum(f.nbytes for f in self.chunks.pop(start))
+
+    def decode(self, start):
+        # One seek to the chunk start, then plain forward decoding
+        began = time.perf_counter()
+        frames = []
+        for index in range(start, self.chunk_end(start)):
+            frame = self.decoder.read_frame(index / self.fps)
+            if frame is None:
+                break
+            # Decoders may reuse their buffers
+            frames.append(frame.copy())
+        stats.record("reverse chunk decode", time.perf_counter() - began)
+        return frames
+
+    def close(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.thread.join(timeout=2)
+        self.decoder.close()
+        self.chunks.clear()
+        self.resident = 0
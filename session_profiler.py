@@ -0,0 +1,132 @@
+import atexit
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# Enable with MEDIAPLAYER_PROFILE=1 or --profile; each played file gets its own
+# collapsed-stack file (for flamegraph.pl / speedscope) and tracemalloc report
+ENV_VAR = "MEDIAPLAYER_PROFILE"
+OUTPUT_DIR = os.environ.get("MEDIAPLAYER_PROFILE_DIR", "profiles")
+SAMPLE_INTERVAL = float(os.environ.get("MEDIAPLAYER_PROFILE_INTERVAL", "0.005"))
+SNAPSHOT_INTERVAL = 10.0
+TOP_ALLOCATIONS = 25
+
+enabled = os.environ.get(ENV_VAR) == "1" or "--profile" in sys.argv
+# Friendly names for threads Python's threading module doesn't know, e.g. QThreads
+thread_names = {}
+# The session switch_session() is running
+current = None
+
+
+def name_thread(name):
+    thread_names[threading.get_ident()] = name
+
+
+def frame_stack(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class SessionProfiler:
+    def __init__(self, media_path, interval=SAMPLE_INTERVAL):
+        self.media_path = media_path
+        self.interval = interval
+        self.samples = Counter()
+        self.first_snapshot = None
+        self.allocation_reports = []
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.started = None
+
+    @property
+    def output_base(self):
+        name = os.path.splitext(os.path.basename(self.media_path))[0] or "session"
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        return os.path.join(OUTPUT_DIR, f"{name}-{stamp}")
+
+    def start(self):
+        self.started = time.time()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.first_snapshot = tracemalloc.take_snapshot()
+        if threading.current_thread() is threading.main_thread():
+            name_thread("gui")
+        self.thread = threading.Thread(target=self.sample_loop, name="profiler", daemon=True)
+        self.thread.start()
+
+    def sample_loop(self):
+        own = threading.get_ident()
+        next_snapshot = time.monotonic() + SNAPSHOT_INTERVAL
+        while not self.stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            names.update(thread_names)
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    name = names.get(ident, f"thread-{ident}")
+                    self.samples[f"{name};{frame_stack(frame)}"] += 1
+            if time.monotonic() >= next_snapshot:
+                self.take_snapshot()
+                next_snapshot += SNAPSHOT_INTERVAL
+
+    def take_snapshot(self):
+        # Keep only the top growth sites so long sessions don't hoard snapshots
+        snapshot = tracemalloc.take_snapshot()
+        top = snapshot.compare_to(self.first_snapshot, "lineno")[:TOP_ALLOCATIONS]
+        elapsed = time.time() - self.started
+        self.allocation_reports.append((elapsed, [str(stat) for stat in top]))
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=1)
+        self.take_snapshot()
+        tracemalloc.stop()
+        return self.write()
+
+    def write(self):
+        try:
+            os.makedirs(OUTPUT_DIR, exist_ok=True)
+            base = self.output_base
+            with open(base + ".collapsed", "w") as f:
+                for stack, count in self.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+            with open(base + ".tracemalloc.txt", "w") as f:
+                for elapsed, lines in self.allocation_reports:
+                    f.write(f"Allocation growth after {elapsed:.1f} s\n")
+                    for line in lines:
+                        f.write(f"  {line}\n")
+            print(f"Profile written to {base}.collapsed")
+            return base
+        except Exception as e:
+            print(f"Error writing profile: {e}")
+            return None
+
+
+def start_session(media_path):
+    # Returns a running profiler when profiling is switched on, otherwise None
+    if not enabled:
+        return None
+    profiler = SessionProfiler(media_path)
+    profiler.start()
+    return profiler
+
+
+def switch_session(media_path):
+    # For players that keep no profiler of their own, like the GhostPlayer
+    # scripts: ends the previous file's session, writing it out, and starts
+    # one for media_path, or none for None. The last one is written at exit
+    global current
+    if current:
+        current.stop()
+    current = start_session(media_path) if media_path else None
+    return current
+
+
+atexit.register(switch_session, None)
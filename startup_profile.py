@@ -0,0 +1,55 @@
+import importlib
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# Set MEDIAPLAYER_PROFILE_STARTUP=1 or pass --profile-startup to print where
+# start-up time goes once the window is up
+ENV_VAR = "MEDIAPLAYER_PROFILE_STARTUP"
+TARGET_MS = 300
+
+started = time.perf_counter()
+enabled = os.environ.get(ENV_VAR) == "1" or "--profile-startup" in sys.argv
+entries = []
+reported = False
+
+
+def record(label, seconds):
+    entries.append((label, seconds))
+    if enabled and reported:
+        print(f"Start-up profile: {label} took {seconds * 1000:.1f} ms on first use")
+
+
+@contextmanager
+def timed(label):
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(label, time.perf_counter() - began)
+
+
+def lazy_import(name):
+    # Import a backend on first use, timing the import the first time only
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with timed(f"import {name}"):
+        return importlib.import_module(name)
+
+
+def report(label="window visible"):
+    global reported
+    total = time.perf_counter() - started
+    if not enabled or reported:
+        return total
+    reported = True
+    print(f"Start-up profile ({label} after {total * 1000:.1f} ms):")
+    for name, seconds in entries:
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
+    accounted = sum(seconds for _, seconds in entries)
+    print(f"  {(total - accounted) * 1000:8.1f} ms  other")
+    if total * 1000 > TARGET_MS:
+        print(f"  Warning: over the {TARGET_MS} ms start-up target")
+    return total
@@ -0,0 +1,67 @@
+import glob
+import os
+import re
+from playback_stats import PlaybackStats
+import metrics_server
+from metrics_server import MetricsCollector, metric_name
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATS_CALL = re.compile(r"stats\.(incr|set|record|timer)\(\"([^\"]+)\"")
+
+
+def registry_with_every_metric():
+    # Every name the player records, found in the sources, so a new metric
+    # that collides with an existing family fails here rather than in a scrape
+    registry = PlaybackStats()
+    for path in glob.glob(os.path.join(ROOT, "*.py")):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for kind, name in STATS_CALL.findall(f.read()):
+                if kind == "incr":
+                    registry.incr(name)
+                elif kind == "set":
+                    registry.set(name, 1.5)
+                else:
+                    registry.record(name, 0.001)
+    registry.set("current file", "clip \"a\".mp4")
+    return registry
+
+
+def test_scrape_has_one_type_line_per_family():
+    text = MetricsCollector(registry_with_every_metric()).render()
+    families = {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert name not in families, f"duplicate # TYPE for {name}"
+            families[name] = kind
+    assert len(families) > 20
+
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        sample, _, value = line.rpartition(" ")
+        float(value)
+        name = sample.split("{")[0]
+        if name not in families:
+            name = re.sub(r"_(sum|count)$", "", name)
+            assert families.get(name) == "summary", f"{sample} has no # TYPE line"
+        assert re.fullmatch(r"[a-zA-Z_:][a-zA-Z0-9_:]*", name)
+
+
+def test_scrape_over_http():
+    registry = PlaybackStats()
+    registry.incr("frames presented", 3)
+    registry.set("current file", "clip.mp4")
+    registry.record("decode", 0.004)
+    server = metrics_server.start(0, registry=registry)
+    try:
+        port = server.server_address[1]
+        samples = metrics_server.scrape(f"http://127.0.0.1:{port}/metrics")
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert samples[metric_name("frames presented total")] == 3
+    assert samples[metric_name("frames decoded total")] == 1
+    assert samples[metric_name("current file info") + "{value=\"clip.mp4\"}"] == 1
+    assert samples[metric_name("decode seconds") + "_count"] == 1
+    assert samples[metric_name("resident memory bytes")] > 0
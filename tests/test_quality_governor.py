@@ -0,0 +1,30 @@
+from quality_governor import QualityGovernor, WINDOW_SECONDS
+
+
+def judged(governor, now, decode_load=0.0, gui_load=0.0, presented=30, dropped=0):
+    governor.frame(presented, dropped)
+    return governor.update(now + WINDOW_SECONDS, decode_load, gui_load)
+
+
+def test_decode_load_skips_levels_that_only_cut_the_gui():
+    governor = QualityGovernor()
+    assert judged(governor, 0, decode_load=1.5)
+    assert governor.level["decimate"] == 2
+    assert governor.level["name"] == "half frame rate"
+
+
+def test_drops_and_gui_load_step_down_one_level():
+    governor = QualityGovernor()
+    assert judged(governor, 0, dropped=5)
+    assert governor.level["name"] == "half resolution"
+    assert judged(governor, WINDOW_SECONDS, gui_load=1.2)
+    assert governor.level["name"] == "fast scaling"
+    assert governor.level["decimate"] == 1
+
+
+def test_no_step_up_while_the_gui_is_busy():
+    governor = QualityGovernor()
+    judged(governor, 0, dropped=5)
+    for second in range(1, 10):
+        assert not judged(governor, second * WINDOW_SECONDS, gui_load=0.7)
+    assert governor.index == 1
@@ -0,0 +1,102 @@
+import playback_backends
+from playback_clock import SimulatedClock
+from playback_engine import PlaybackEngine
+
+FPS = 30
+DURATION = 2 * 60 * 60
+
+
+class FakeFrame:
+    # Just enough of an ndarray for the frame cache
+    nbytes = 64
+    shape = (4, 4, 3)
+
+    def __init__(self, index):
+        self.index = index
+
+    def copy(self):
+        return FakeFrame(self.index)
+
+
+class FakeBackend(playback_backends.PlaybackBackend):
+    name = "fake"
+
+    def open(self, path):
+        self.path = path
+        self.fps = FPS
+        self.duration = DURATION
+        self.size = (1280, 720)
+
+    def read_frame(self, t=None):
+        index = int(round(t * FPS))
+        return FakeFrame(index) if t < self.duration else None
+
+    def audio_clip(self):
+        return None
+
+
+def opened(path, candidates=None):
+    backend = FakeBackend()
+    backend.open(path)
+    return backend
+
+
+def test_two_hours_with_pause_resume_and_seek(monkeypatch):
+    # 2 h at 30 fps in simulated time: pause at 10 min for a minute, then at
+    # wall time 61 min seek from media 60 min to 90 min and play to the end
+    monkeypatch.setattr(playback_backends, "open_backend", opened)
+
+    clock = SimulatedClock()
+    shown = []
+    finished = []
+    engine = PlaybackEngine(on_frame=lambda frame, pts: shown.append(frame.index),
+                            on_finished=lambda: finished.append(clock.now()),
+                            audio=False, clock=clock, auto_proxy=False, adaptive_quality=False)
+    assert engine.open("simulated.mp4")
+    clock.call_at(600, engine.pause)
+    clock.call_at(660, engine.resume)
+    clock.call_at(3660, lambda: engine.seek(5400))
+    engine.running = True
+    engine.run()
+
+    last = DURATION * FPS - 1
+    assert finished and abs(finished[0] - (DURATION - 5400 + 3660)) < 1
+    assert abs(engine.current_time - last / FPS) < 1e-6
+    # Every frame once, in order, apart from the half hour skipped by the seek
+    assert shown == list(range(0, 3600 * FPS)) + list(range(5400 * FPS, last + 1))
+
+
+def test_reverse_from_ten_seconds_to_the_start(monkeypatch):
+    # Forward for 10 s, then reverse at 1x: every earlier frame once, newest
+    # first, each 1/30 s after the last, then a pause at the start
+    monkeypatch.setattr(playback_backends, "open_backend", opened)
+
+    clock = SimulatedClock()
+    shown = []
+    states = []
+
+    def on_frame(frame, pts):
+        shown.append((frame.index, clock.now()))
+        # A frame repeated without the clock moving would otherwise never end
+        assert len(shown) < 1000
+
+    def on_state():
+        states.append((clock.now(), engine.paused, engine.reverse, engine.current_time))
+
+    engine = PlaybackEngine(on_frame=on_frame, on_state=on_state,
+                            audio=False, clock=clock, auto_proxy=False, adaptive_quality=False)
+    assert engine.open("simulated.mp4")
+    clock.call_at(10, lambda: engine.set_reverse(True))
+    clock.call_at(30, engine.halt)
+    engine.running = True
+    engine.run()
+
+    indices = [index for index, _ in shown]
+    assert indices == list(range(0, 10 * FPS)) + list(range(10 * FPS - 2, -1, -1))
+    for i, (index, when) in enumerate(shown[10 * FPS:]):
+        assert abs(when - (10 + i / FPS)) < 1e-6
+    # Frame 0 stays up for its interval, then reverse ends paused at the start
+    assert len(states) == 1
+    when, paused, reverse, position = states[0]
+    assert abs(when - (10 + (10 * FPS - 1) / FPS)) < 1e-6
+    assert paused and not reverse and position == 0
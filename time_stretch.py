@@ -0,0 +1,71 @@
+import numpy as np
+
+# WSOLA: 1024-sample grains (23 ms at 44.1 kHz) overlap-added every 512
+# samples, each taken from up to 256 samples either side of its nominal input
+# position wherever it best continues the previous grain's waveform
+GRAIN = 1024
+TOLERANCE = 256
+
+
+class WsolaStretcher:
+    # Changes tempo without changing pitch. Work is per grain, never per
+    # sample: the similarity search is one np.correlate over the search region
+    # and each grain is windowed and overlap-added as a whole block
+    def __init__(self, rate=1.0, grain=GRAIN, tolerance=TOLERANCE):
+        self.rate = rate
+        self.grain = grain
+        self.hop = grain // 2
+        self.tolerance = tolerance
+        # A periodic Hann window sums to exactly one at 50% overlap
+        self.window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(grain) / grain)).astype(np.float32)[:, None]
+        self.reset(0)
+
+    def reset(self, position):
+        # Called on seek and rate change; position is in input samples
+        self.analysis = float(position)
+        self.natural = None
+        self.tail = None
+        self.pending = []
+        self.pending_frames = 0
+
+    @property
+    def position(self):
+        return int(self.analysis)
+
+    def grain_at(self, samples, start):
+        grain = samples[start:start + self.grain]
+        if len(grain) < self.grain:
+            grain = np.concatenate([grain, np.zeros((self.grain - len(grain), samples.shape[1]), np.float32)])
+        return grain * self.window
+
+    def best_start(self, samples, nominal):
+        # The start within the tolerance whose first half best matches what
+        # naturally followed the previous grain
+        last = len(samples) - self.grain
+        low = max(nominal - self.tolerance, 0)
+        high = min(nominal + self.tolerance, last)
+        if self.natural is None or high <= low or self.natural + self.hop > len(samples):
+            return min(max(nominal, 0), max(last, 0))
+        target = samples[self.natural:self.natural + self.hop].mean(axis=1)
+        region = samples[low:high + self.hop].mean(axis=1)
+        return low + int(np.argmax(np.correlate(region, target, "valid")))
+
+    def next_block(self, samples):
+        start = self.best_start(samples, int(self.analysis))
+        grain = self.grain_at(samples, start)
+        block = grain[:self.hop] if self.tail is None else self.tail + grain[:self.hop]
+        self.tail = grain[self.hop:]
+        self.natural = start + self.hop
+        self.analysis += self.hop * self.rate
+        return block
+
+    def read(self, samples, frames):
+        # The next `frames` output samples; past the end of the input they are silence
+        while self.pending_frames < frames:
+            block = self.next_block(samples)
+            self.pending.append(block)
+            self.pending_frames += len(block)
+        out = np.concatenate(self.pending)
+        self.pending = [out[frames:]]
+        self.pending_frames = len(out) - frames
+        return out[:frames]
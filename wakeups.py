@@ -0,0 +1,38 @@
+import atexit
+import os
+import time
+
+# Set MEDIAPLAYER_WAKEUPS=1 to print how often each playback loop and timer
+# woke up when the player exits
+ENV_VAR = "MEDIAPLAYER_WAKEUPS"
+
+
+class WakeupCounter:
+    def __init__(self):
+        self.counts = {}
+        self.started = time.monotonic()
+
+    def count(self, name):
+        # Plain dict update; cheap enough to call on every loop iteration
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def reset(self):
+        self.counts = {}
+        self.started = time.monotonic()
+
+    def rates(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {name: count / elapsed for name, count in self.counts.items()}
+
+    def report(self):
+        elapsed = time.monotonic() - self.started
+        print(f"Wake-ups over {elapsed:.1f} s:")
+        for name, rate in sorted(self.rates().items()):
+            print(f"  {rate:8.2f}/s  {self.counts[name]:8d}  {name}")
+
+
+counter = WakeupCounter()
+count = counter.count
+
+if os.environ.get(ENV_VAR) == "1":
+    atexit.register(counter.report)